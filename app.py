@@ -12,19 +12,35 @@ from datetime import datetime
 # Variáveis de ambiente são carregadas automaticamente pelo sistema
 # No Render, as environment variables são injetadas automaticamente
 
+def _registrar_configuracao_banco(app, engine):
+    """Registra no log as configurações efetivas do engine e do pool"""
+    pool = engine.pool
+    if hasattr(pool, '_max_overflow'):
+        por_processo = pool.size() + max(pool._max_overflow, 0)
+        detalhes = (
+            f"pool_size={pool.size()} max_overflow={pool._max_overflow} "
+            f"pool_timeout={pool._timeout}s pool_recycle={pool._recycle}s "
+            f"pre_ping={pool._pre_ping} | até {por_processo} conexões por processo, "
+            f"{por_processo * app.config['WEB_CONCURRENCY']} com {app.config['WEB_CONCURRENCY']} "
+            f"worker(s) de {app.config['GUNICORN_THREADS']} thread(s)"
+        )
+    else:
+        detalhes = f"pre_ping={getattr(pool, '_pre_ping', False)}"
+    
+    app.logger.info(f"Banco {engine.dialect.name}: {type(pool).__name__} {detalhes}")
+
 def create_app():
     """Factory function para criar a aplicação Flask otimizada para Render"""
     
     # Criar aplicação
     app = Flask(__name__)
     
-    # Configuração para produção no Render
-    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
-    
-    # Configurações de ambiente
+    # Configuração por ambiente (config.py): development, production ou testing
+    from config import config, opcoes_engine
     flask_env = os.environ.get('FLASK_ENV', 'development')
+    classe_config = config.get(flask_env, config['default'])
+    app.config.from_object(classe_config)
     app.config['ENV'] = flask_env
-    app.debug = flask_env == 'development'
     
     # Configuração do banco de dados - ROBUSTA para Render
     database_url = os.environ.get('DATABASE_URL')
@@ -40,10 +56,7 @@ def create_app():
         app.config['SQLALCHEMY_DATABASE_URI'] = database_url
         print("✅ Banco PostgreSQL configurado (Render)")
     else:
-        # Fallback para desenvolvimento local ou erro no Render
-        sqlite_path = 'sqlite:///sistema_banco_horas.db'
-        app.config['SQLALCHEMY_DATABASE_URI'] = sqlite_path
-        
+        # Fallback para desenvolvimento local ou erro no Render: SQLite da classe de configuração
         if flask_env == 'production':
             print("⚠️  WARNING: DATABASE_URL não encontrada no Render!")
             print("📋 Configure a variável DATABASE_URL nas Environment Variables")
@@ -51,10 +64,9 @@ def create_app():
         else:
             print("💾 Usando SQLite para desenvolvimento local")
     
-    # Configurações gerais
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['WTF_CSRF_ENABLED'] = True
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
+    # Pool e opções do engine conforme o banco e a concorrência configurada
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes_engine(app.config)
+    classe_config.init_app(app)
     
     # Configurar logging
     if not app.debug:
@@ -71,51 +83,15 @@ def create_app():
         app.logger.info('Sistema de Banco de Horas iniciado')
     
     # Inicializar extensões
-    from flask_app.models import db
+    from flask_app.models import db, configurar_conexoes
     db.init_app(app)
     
-    # Criar tabelas automaticamente se não existirem
+    # Nenhuma consulta ao banco aqui: criar a aplicação deve ser barato (cold start).
+    # Tabelas, migrações e dados iniciais ficam no passo explícito init_db.py.
     with app.app_context():
-        try:
-            db.create_all()
-            
-            # Criar dados iniciais se necessário (apenas em produção)
-            if flask_env == 'production':
-                from flask_app.models import Usuario, AreaAtuacao, Cargo
-                
-                # Verificar se já existe admin
-                if not Usuario.query.filter_by(is_admin=True).first():
-                    # Criar área padrão
-                    if not AreaAtuacao.query.first():
-                        area = AreaAtuacao(nome='Tecnologia', descricao='Área de TI')
-                        db.session.add(area)
-                        db.session.flush()
-                        
-                        # Criar cargo padrão
-                        cargo = Cargo(nome='Administrador', descricao='Administrador do Sistema', area_atuacao_id=area.id)
-                        db.session.add(cargo)
-                        db.session.flush()
-                        
-                        # Criar usuário admin
-                        admin = Usuario(
-                            username='alissonporto',
-                            email='alissonporto@sistema.com',
-                            nome_completo='Alisson Porto',
-                            is_admin=True,
-                            cargo_id=cargo.id,
-                            data_admissao=datetime.now().date(),
-                            ativo=True
-                        )
-                        admin.set_password('porto510')
-                        db.session.add(admin)
-                        db.session.commit()
-                        
-                        app.logger.info("Dados iniciais criados com sucesso!")
-                        
-        except Exception as e:
-            app.logger.error(f"Erro na inicialização do banco: {e}")
-            # Não falhar a aplicação por problemas de inicialização
-            pass
+        # Ajustes por conexão (PRAGMAs no SQLite, timeouts no PostgreSQL)
+        configurar_conexoes(db.engine, app.config)
+        _registrar_configuracao_banco(app, db.engine)
     
     # Registrar blueprint de autenticação
     from flask_app.auth import auth_bp
@@ -144,51 +120,54 @@ def create_app():
             current_year=datetime.now().year
         )
     
+    # Worker de resumos dentro do processo (alternativa ao worker_resumos.py)
+    if not app.config['ADIAR_THREADS']:
+        from flask_app.worker import iniciar_se_configurado
+        iniciar_se_configurado(app)
+    
+    _registrar_rotas_sistema(app)
+    
     return app
 
-# Criar aplicação
-app = create_app()
-
-# EMERGÊNCIA: Expor app no namespace global para Gunicorn app:app
-# Esta linha garante que 'app' esteja disponível mesmo com conflitos
-application = app  # Gunicorn também aceita 'application'
-flask_app = app    # Backup adicional
-
-# Health check endpoint para Render
-@app.route('/health')
-def health_check():
-    try:
-        # Verificar conexão com o banco
-        from flask_app.models import db
-        db.engine.execute('SELECT 1')
-        return {'status': 'healthy', 'database': 'connected'}, 200
-    except Exception as e:
-        return {'status': 'unhealthy', 'error': str(e)}, 503
-
-# Rota inicial - redireciona para login ou setup
-@app.route('/')
-def index():
-    try:
-        # Verificar se já existe um usuário admin
-        from flask_app.models import Usuario
-        if not Usuario.query.filter_by(is_admin=True).first():
-            return redirect(url_for('auth.setup'))
-        
-        # Se não estiver logado, vai para login
-        if 'user_id' not in session:
-            return redirect(url_for('auth.login'))
-        
-        # Se estiver logado, vai para dashboard
-        return redirect(url_for('main.dashboard'))
-    except Exception as e:
-        app.logger.error(f"Erro na rota inicial: {e}")
-        return f"Sistema inicializando... Aguarde alguns minutos. Erro: {e}", 503
+def _registrar_rotas_sistema(app):
+    """Health check e rota inicial"""
+    
+    # Health check endpoint para Render
+    @app.route('/health')
+    def health_check():
+        try:
+            # Verificar conexão com o banco
+            from flask_app.models import db
+            db.session.execute(db.text('SELECT 1'))
+            return {'status': 'healthy', 'database': 'connected'}, 200
+        except Exception as e:
+            return {'status': 'unhealthy', 'error': str(e)}, 503
+    
+    # Rota inicial - redireciona para login ou setup
+    @app.route('/')
+    def index():
+        try:
+            # Verificar se já existe um usuário admin
+            from flask_app.models import Usuario
+            if not Usuario.query.filter_by(is_admin=True).first():
+                return redirect(url_for('auth.setup'))
+            
+            # Se não estiver logado, vai para login
+            if 'user_id' not in session:
+                return redirect(url_for('auth.login'))
+            
+            # Se estiver logado, vai para dashboard
+            return redirect(url_for('main.dashboard'))
+        except Exception as e:
+            app.logger.error(f"Erro na rota inicial: {e}")
+            return f"Sistema inicializando... Aguarde alguns minutos. Erro: {e}", 503
 
 if __name__ == '__main__':
     # Configuração para desenvolvimento local
+    app = create_app()
     with app.app_context():
-        from flask_app.models import db
-        db.create_all()
+        from flask_app.models import criar_estrutura
+        criar_estrutura()
         
         # Log de inicialização
         app.logger.info("Sistema de Banco de Horas iniciado com sucesso!")
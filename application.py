@@ -4,8 +4,8 @@ Entry point alternativo - application.py
 Para casos onde Render procura por application:app
 """
 
-# Importar do run.py (nosso entry point principal)
-from run import app, application
+# Importar do wsgi.py (nosso entry point principal)
+from wsgi import app, application
 
 # Expor com nomes alternativos
 flask_app = app
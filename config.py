@@ -12,14 +12,14 @@ class Config:
     # Configurações básicas
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     
-    # Configuração do banco de dados
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///banco_horas.db'
+    # Configuração do banco de dados (DATABASE_URL é tratada em create_app)
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///sistema_banco_horas.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-        'echo': False  # Set True for SQL debugging
-    }
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', '0') == '1'  # Defina 1 para depurar SQL
+    
+    # Concorrência do gunicorn (ver gunicorn.conf.py): processos e threads por processo
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 1))
     
     # Configurações de sessão
     PERMANENT_SESSION_LIFETIME = timedelta(hours=8)
@@ -33,19 +33,56 @@ class Config:
     WTF_CSRF_TIME_LIMIT = None
     
     # Configurações de performance
-    SQLALCHEMY_RECORD_QUERIES = True
-    DATABASE_QUERY_TIMEOUT = 30
+    SQLALCHEMY_RECORD_QUERIES = False
+    DATABASE_QUERY_TIMEOUT = int(os.environ.get('DATABASE_QUERY_TIMEOUT', 30))  # segundos (statement_timeout no PostgreSQL)
+    DATABASE_WORK_MEM = os.environ.get('DATABASE_WORK_MEM', '16MB')  # PostgreSQL
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # milissegundos de espera por lock no SQLite
+    DATABASE_CONNECT_TIMEOUT = int(os.environ.get('DATABASE_CONNECT_TIMEOUT', 10))  # segundos
+    DATABASE_POOL_RECYCLE = int(os.environ.get('DATABASE_POOL_RECYCLE', 300))  # segundos
+    
+    # Configurações de resumos diários
+    RESUMOS_MODO = os.environ.get('RESUMOS_MODO', 'sincrono')  # 'sincrono' ou 'fila'
+    RESUMOS_WORKER_THREAD = os.environ.get('RESUMOS_WORKER_THREAD', '0') == '1'
+    RESUMOS_WORKER_INTERVALO = float(os.environ.get('RESUMOS_WORKER_INTERVALO', 2))  # segundos
+    # Com preload_app o gunicorn cria a aplicação no mestre; as threads de fundo
+    # ficam para o hook post_fork de cada worker (gunicorn.conf.py)
+    ADIAR_THREADS = os.environ.get('ADIAR_THREADS', '0') == '1'
     
     # Configurações de exportação
-    EXCEL_EXPORT_PATH = os.path.expanduser('~/Downloads')
     MAX_EXPORT_RECORDS = 10000
+    EXPORTACAO_WORKERS = int(os.environ.get('EXPORTACAO_WORKERS', 2))
+    EXPORTACAO_CACHE_DIR = os.environ.get('EXPORTACAO_CACHE_DIR')  # padrão: pasta temporária do sistema
+    EXPORTACAO_CACHE_TTL = int(os.environ.get('EXPORTACAO_CACHE_TTL', 3600))  # segundos
+    EXPORTACAO_TEMPORARIO_ABANDONADO = int(os.environ.get('EXPORTACAO_TEMPORARIO_ABANDONADO', 600))  # segundos sem escrita
+    
+    # Pool de conexões por processo: uma conexão por thread do gunicorn, mais as
+    # threads de exportação e o worker de resumos. O total no banco é esse valor
+    # (com o overflow) vezes WEB_CONCURRENCY.
+    DATABASE_POOL_SIZE = int(os.environ.get(
+        'DATABASE_POOL_SIZE', GUNICORN_THREADS + EXPORTACAO_WORKERS + int(RESUMOS_WORKER_THREAD)
+    ))
+    DATABASE_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW', 2))
+    DATABASE_POOL_TIMEOUT = int(os.environ.get('DATABASE_POOL_TIMEOUT', 10))  # segundos esperando conexão livre
+    
+    # Configurações de importação
+    IMPORTACAO_MAX_REGISTROS = int(os.environ.get('IMPORTACAO_MAX_REGISTROS', 10000))  # por requisição em /api/registros/bulk
+    
+    # Cache dos indicadores do dashboard ('simple' no processo ou 'redis' compartilhado)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))  # segundos
+    # Cache local: intervalo entre leituras das gerações no banco (atraso máximo da
+    # invalidação vinda de outro processo)
+    CACHE_GERACOES_INTERVALO = float(os.environ.get('CACHE_GERACOES_INTERVALO', 1))  # segundos
+    # Tempo de vida do cache local quando o banco ainda não tem a tabela geracoes_cache
+    CACHE_TIMEOUT_SEM_GERACOES = int(os.environ.get('CACHE_TIMEOUT_SEM_GERACOES', 10))  # segundos
     
     # Configurações de logging
     LOG_LEVEL = 'INFO'
     LOG_FILE = 'sistema_banco_horas.log'
     
     # Configurações de paginação
-    RECORDS_PER_PAGE = 20
+    RECORDS_PER_PAGE = int(os.environ.get('RECORDS_PER_PAGE', 20))
     MAX_SEARCH_RESULTS = 1000
     
     # Configurações de validação
@@ -58,23 +95,40 @@ class Config:
     MAX_SALARY = 999999.99
     MIN_YEAR = 2020
     MAX_YEAR = 2030
+    
+    TIMEZONE = 'America/Sao_Paulo'
+    
+    @staticmethod
+    def init_app(app):
+        pass
 
 class DevelopmentConfig(Config):
     """Configuração para desenvolvimento"""
     DEBUG = True
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-        'echo': True  # SQL debugging habilitado
-    }
 
 class ProductionConfig(Config):
-    """Configuração para produção"""
+    """Configuração para produção (Render)"""
     DEBUG = False
     # Configurações de segurança para produção
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+    WTF_CSRF_TIME_LIMIT = 3600
+    SEND_FILE_MAX_AGE_DEFAULT = 31536000  # 1 ano
+    
+    @staticmethod
+    def init_app(app):
+        """Log para stdout (o Render captura automaticamente)"""
+        import logging
+        
+        if not app.debug:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setLevel(logging.INFO)
+            stream_handler.setFormatter(logging.Formatter(
+                '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+            ))
+            app.logger.addHandler(stream_handler)
+            app.logger.setLevel(logging.INFO)
 
 class TestingConfig(Config):
     """Configuração para testes"""
@@ -88,4 +142,39 @@ config = {
     'production': ProductionConfig,
     'testing': TestingConfig,
     'default': DevelopmentConfig
-}
\ No newline at end of file
+}
+
+def get_config():
+    """Retorna a classe de configuração do ambiente (FLASK_ENV)"""
+    return config.get(os.environ.get('FLASK_ENV', 'development'), config['default'])
+
+def opcoes_engine(app_config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS para o banco configurado: pool dimensionado
+    pelas configurações DATABASE_POOL_* no PostgreSQL e opções simples no SQLite
+    """
+    uri = app_config['SQLALCHEMY_DATABASE_URI']
+    opcoes = {
+        'pool_pre_ping': True,
+        'pool_recycle': app_config['DATABASE_POOL_RECYCLE'],
+    }
+    
+    if uri.startswith('postgresql'):
+        opcoes.update({
+            'pool_size': app_config['DATABASE_POOL_SIZE'],
+            'max_overflow': app_config['DATABASE_MAX_OVERFLOW'],
+            'pool_timeout': app_config['DATABASE_POOL_TIMEOUT'],
+            'connect_args': {
+                'connect_timeout': app_config['DATABASE_CONNECT_TIMEOUT'],
+                'application_name': 'sistema_banco_horas'
+            }
+        })
+    elif uri.startswith('sqlite') and ':memory:' not in uri:
+        # SQLite em arquivo usa QueuePool: uma conexão por thread basta (WAL)
+        opcoes.update({
+            'pool_size': app_config['DATABASE_POOL_SIZE'],
+            'max_overflow': app_config['DATABASE_MAX_OVERFLOW'],
+            'pool_timeout': app_config['DATABASE_POOL_TIMEOUT'],
+        })
+    
+    return opcoes
@@ -58,27 +58,27 @@ def debug_render_environment():
         except ImportError as e:
             print(f"   ❌ {module}: {e}")
     
-    # Teste do main.py
-    print(f"\n🎯 Testando main.py:")
+    # Teste do wsgi.py
+    print(f"\n🎯 Testando wsgi.py:")
     try:
-        from main import app
-        print(f"   ✅ main.py importado com sucesso!")
+        from wsgi import app
+        print(f"   ✅ wsgi.py importado com sucesso!")
         print(f"   📱 Tipo da app: {type(app)}")
         print(f"   🏷️  Nome da app: {app.name}")
         print(f"   ⚙️  Config SECRET_KEY: {'Definido' if app.config.get('SECRET_KEY') else 'NÃO definido'}")
         print(f"   🗄️  Database URI: {app.config.get('SQLALCHEMY_DATABASE_URI', 'NÃO definido')[:50]}...")
     except Exception as e:
-        print(f"   ❌ Erro ao importar main.py:")
+        print(f"   ❌ Erro ao importar wsgi.py:")
         print(f"      {e}")
         traceback.print_exc()
     
     # Teste do banco de dados
     print(f"\n🗄️  Testando conexão com banco:")
     try:
-        from main import app
+        from wsgi import app
         with app.app_context():
             from flask_app.models import db
-            db.engine.execute('SELECT 1')
+            db.session.execute(db.text('SELECT 1'))
             print(f"   ✅ Conexão com banco OK!")
     except Exception as e:
         print(f"   ❌ Erro na conexão com banco:")
@@ -0,0 +1,163 @@
+"""
+Cache de indicadores
+Guarda valores pequenos (contagens e totais do dashboard) com tempo de vida.
+CACHE_TYPE = 'simple' usa um dicionário no próprio processo; 'redis' usa o
+servidor em CACHE_REDIS_URL, compartilhado entre os processos do gunicorn.
+As chaves são invalidadas pelos eventos de commit em models.py. No cache local,
+cada valor guarda também a geração da chave no banco (models.GeracaoCache), que
+é incrementada depois do commit: assim a gravação feita em um processo invalida
+o valor guardado nos demais em até CACHE_GERACOES_INTERVALO segundos.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+
+class CacheLocal:
+    """Cache em memória do processo, com expiração por chave"""
+    
+    compartilhado = False
+
+    def __init__(self, intervalo_geracoes=1):
+        self._dados = {}
+        self._lock = threading.Lock()
+        self._intervalo_geracoes = intervalo_geracoes
+        self._geracoes = None
+        self._geracoes_lidas_em = 0
+
+    def geracoes(self, ler):
+        """
+        Gerações das chaves no banco, relidas com `ler()` no máximo uma vez por
+        intervalo: o processo paga uma consulta por intervalo, não uma por requisição
+        """
+        agora = time.monotonic()
+        with self._lock:
+            if self._geracoes is not None and agora - self._geracoes_lidas_em < self._intervalo_geracoes:
+                return self._geracoes
+        geracoes = ler()
+        with self._lock:
+            self._geracoes, self._geracoes_lidas_em = geracoes, agora
+        return geracoes
+
+    def get(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                return None
+            return valor
+
+    def set(self, chave, valor, ttl):
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + ttl)
+
+    def delete(self, *chaves):
+        with self._lock:
+            for chave in chaves:
+                self._dados.pop(chave, None)
+
+
+class CacheRedis:
+    """Cache no Redis, para que todos os processos vejam a mesma invalidação"""
+
+    PREFIXO = 'banco_horas:'
+    compartilhado = True
+
+    def __init__(self, url):
+        import redis
+        self._cliente = redis.Redis.from_url(url)
+
+    def get(self, chave):
+        valor = self._cliente.get(self.PREFIXO + chave)
+        return json.loads(valor) if valor is not None else None
+
+    def set(self, chave, valor, ttl):
+        self._cliente.setex(self.PREFIXO + chave, int(ttl), json.dumps(valor))
+
+    def delete(self, *chaves):
+        if chaves:
+            self._cliente.delete(*[self.PREFIXO + chave for chave in chaves])
+
+
+def _criar_cache(config):
+    if config.get('CACHE_TYPE') == 'redis':
+        try:
+            return CacheRedis(config['CACHE_REDIS_URL'])
+        except (ImportError, KeyError) as e:
+            logger.warning(f"Cache Redis indisponível ({e}), usando cache local")
+    return CacheLocal(config.get('CACHE_GERACOES_INTERVALO', 1))
+
+
+def obter_cache():
+    """Cache da aplicação atual, criado no primeiro uso"""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('cache_indicadores')
+    if cache is None:
+        cache = app.extensions.setdefault('cache_indicadores', _criar_cache(app.config))
+    return cache
+
+
+def _ler_geracoes():
+    # Conexão própria: uma falha aqui não interrompe a transação da requisição
+    from flask_app.models import db, GeracaoCache
+    with db.engine.connect() as conexao:
+        return GeracaoCache.atuais(conexao)
+
+
+def usa_geracoes(cache):
+    """
+    Se o cache confere as gerações no banco: só o local, e só quando a tabela
+    existe (gunicorn.conf.py desliga CACHE_GERACOES e encurta o TTL se faltar)
+    """
+    return not cache.compartilhado and current_app.config.get('CACHE_GERACOES', True)
+
+
+def memorizar(chave, calcular, ttl=None):
+    """Valor em cache para `chave`, ou o resultado de `calcular()` guardado por `ttl` segundos"""
+    cache = obter_cache()
+    try:
+        # Cache local: o valor só vale enquanto a geração da chave no banco não mudar
+        geracao = cache.geracoes(_ler_geracoes).get(chave, 0) if usa_geracoes(cache) else None
+        item = cache.get(chave)
+    except Exception as e:
+        logger.warning(f"Erro ao ler o cache ({chave}): {e}")
+        return calcular()
+
+    if item is not None:
+        if cache.compartilhado:
+            return item
+        if item[0] == geracao:
+            return item[1]
+
+    valor = calcular()
+    try:
+        cache.set(
+            chave, valor if cache.compartilhado else (geracao, valor),
+            ttl or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        )
+    except Exception as e:
+        logger.warning(f"Erro ao gravar o cache ({chave}): {e}")
+    return valor
+
+
+def invalidar(*chaves):
+    """Remove as chaves do cache (sem efeito fora de um contexto de aplicação)"""
+    if not chaves or not has_app_context():
+        return
+    try:
+        obter_cache().delete(*chaves)
+    except Exception as e:
+        logger.warning(f"Erro ao invalidar o cache ({', '.join(chaves)}): {e}")
+
+
+def chave_horas_mes(ano, mes):
+    return f'horas_mes:{ano}-{mes:02d}'
@@ -0,0 +1,272 @@
+"""
+Exportações em segundo plano
+Os arquivos Excel são gerados por um pool de threads e guardados em disco,
+identificados pelo hash de (tipo, filtros, versão dos dados). Exportações
+idênticas reaproveitam o arquivo pronto até o TTL expirar. Com vários processos
+do gunicorn, o arquivo temporário em disco indica que outro processo já está
+gerando a exportação; uma thread de cada processo renova os temporários dos seus
+jobs (na fila ou gerando) para que eles não pareçam abandonados.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from flask_app.models import db, AreaAtuacao, Cargo, Funcionario, ResumoAnual
+
+logger = logging.getLogger(__name__)
+
+# Estado das exportações deste processo: {job_id: {...}}
+_jobs = {}
+_jobs_lock = threading.Lock()
+_executor = None
+_renovador = None
+
+
+def _obter_executor():
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('EXPORTACAO_WORKERS', 2),
+                thread_name_prefix='exportacao'
+            )
+        return _executor
+
+
+def _renovar_temporarios(intervalo):
+    """Atualiza o mtime dos temporários dos jobs deste processo ainda não encerrados"""
+    while True:
+        time.sleep(intervalo)
+        with _jobs_lock:
+            temporarios = [
+                job['temporario'] for job in _jobs.values()
+                if job['status'] in ('pendente', 'processando')
+            ]
+        for caminho in temporarios:
+            try:
+                os.utime(caminho)
+            except OSError:
+                # Já publicado ou removido
+                pass
+
+
+def _iniciar_renovador():
+    """Inicia (uma vez por processo, já depois do fork) a renovação dos temporários"""
+    global _renovador
+    intervalo = max(1, current_app.config.get('EXPORTACAO_TEMPORARIO_ABANDONADO', 600) / 4)
+    with _jobs_lock:
+        if _renovador is None:
+            _renovador = threading.Thread(
+                target=_renovar_temporarios, args=(intervalo,),
+                name='exportacao-renovacao', daemon=True
+            )
+            _renovador.start()
+
+
+def _pasta_cache():
+    pasta = current_app.config.get('EXPORTACAO_CACHE_DIR') or os.path.join(
+        tempfile.gettempdir(), 'banco_horas_exportacoes'
+    )
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def job_id_valido(job_id):
+    return bool(re.fullmatch(r'[0-9a-f]{32}', job_id or ''))
+
+
+def _caminho_arquivo(job_id):
+    return os.path.join(_pasta_cache(), f'{job_id}.xlsx')
+
+
+def versao_dados():
+    """
+    Versão dos dados exportados, em uma única consulta. As horas vêm do
+    consolidado anual (poucas linhas), que muda sempre que um registro é criado,
+    alterado ou removido. Nomes, cargos e áreas entram pela contagem e pela
+    última alteração de cada cadastro, para que renomear um funcionário, cargo
+    ou área não sirva a planilha antiga.
+    """
+    colunas = [
+        db.session.query(db.func.count(ResumoAnual.id)).scalar_subquery(),
+        db.session.query(db.func.max(ResumoAnual.atualizado_em)).scalar_subquery(),
+        db.session.query(db.func.sum(ResumoAnual.total_horas)).scalar_subquery(),
+    ]
+    for modelo in (Funcionario, Cargo, AreaAtuacao):
+        colunas += [
+            db.session.query(db.func.count(modelo.id)).scalar_subquery(),
+            db.session.query(db.func.max(modelo.atualizado_em)).scalar_subquery(),
+        ]
+    return ':'.join(str(valor) for valor in db.session.query(*colunas).one())
+
+
+def chave_exportacao(tipo, funcionario_id, mes, ano):
+    """Identificador da exportação: hash de tipo, filtros e versão dos dados"""
+    conteudo = json.dumps({
+        'tipo': tipo,
+        'funcionario_id': funcionario_id,
+        'mes': mes,
+        'ano': ano,
+        'versao': versao_dados()
+    }, sort_keys=True)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32]
+
+
+def _limite_abandono():
+    """Temporários sem escrita desde este instante são de exportações interrompidas"""
+    return time.time() - current_app.config.get('EXPORTACAO_TEMPORARIO_ABANDONADO', 600)
+
+
+def remover_expirados():
+    """
+    Remove do cache os arquivos mais antigos que EXPORTACAO_CACHE_TTL, os
+    temporários abandonados (processo reciclado ou encerrado no meio da
+    exportação) e os jobs encerrados deste processo mais antigos que o TTL
+    """
+    limite = time.time() - current_app.config.get('EXPORTACAO_CACHE_TTL', 3600)
+    limite_temporarios = _limite_abandono()
+    pasta = _pasta_cache()
+
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        temporario = nome.endswith('.tmp')
+        try:
+            if os.path.getmtime(caminho) < (limite_temporarios if temporario else limite):
+                os.remove(caminho)
+                if not temporario:
+                    with _jobs_lock:
+                        _jobs.pop(nome.split('.')[0], None)
+        except OSError:
+            # Arquivo removido por outro processo ou ainda sendo escrito
+            pass
+
+    with _jobs_lock:
+        for job_id in [job_id for job_id, job in _jobs.items()
+                       if job['status'] in ('concluido', 'erro') and job['criado_em'] < limite]:
+            del _jobs[job_id]
+
+
+def arquivo_pronto(job_id):
+    """Caminho do arquivo em cache, se existir"""
+    caminho = _caminho_arquivo(job_id)
+    return caminho if os.path.exists(caminho) else None
+
+
+def _gerando_em_outro_processo(job_id):
+    """
+    Há um arquivo temporário desta exportação escrito recentemente por algum
+    processo. Temporários parados há mais de EXPORTACAO_TEMPORARIO_ABANDONADO
+    segundos são de um processo que morreu no meio e são apagados.
+    """
+    limite = _limite_abandono()
+    for caminho in glob.glob(f'{_caminho_arquivo(job_id)}.*.tmp'):
+        try:
+            if os.path.getmtime(caminho) >= limite:
+                return True
+            os.remove(caminho)
+        except OSError:
+            pass
+    return False
+
+
+def submeter_exportacao(tipo, funcionario_id, mes, ano):
+    """
+    Agenda a geração do relatório, reaproveitando o cache ou um job em andamento
+
+    Returns:
+        dict: Estado do job (ver status_exportacao)
+    """
+    from flask_app.utils import escrever_relatorio_excel
+
+    remover_expirados()
+    job_id = chave_exportacao(tipo, funcionario_id, mes, ano)
+
+    if arquivo_pronto(job_id):
+        return status_exportacao(job_id)
+
+    app = current_app._get_current_object()
+    destino = _caminho_arquivo(job_id)
+    temporario = f'{destino}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        em_andamento = job and job['status'] in ('pendente', 'processando')
+        if not job and _gerando_em_outro_processo(job_id):
+            em_andamento = True
+        elif not em_andamento:
+            # Criado já no agendamento, para que os outros processos vejam o job
+            open(temporario, 'wb').close()
+            _jobs[job_id] = {
+                'status': 'pendente', 'linhas': 0, 'erro': None,
+                'criado_em': time.time(), 'temporario': temporario
+            }
+
+    if em_andamento:
+        return status_exportacao(job_id)
+
+    _iniciar_renovador()
+
+    def atualizar(**campos):
+        with _jobs_lock:
+            _jobs[job_id].update(campos)
+
+    def executar():
+        with app.app_context():
+            try:
+                # Pode ter esperado na fila do executor: o temporário volta a ser recente
+                os.utime(temporario)
+                atualizar(status='processando')
+                with open(temporario, 'wb') as arquivo:
+                    escrever_relatorio_excel(
+                        arquivo, tipo, funcionario_id, mes, ano,
+                        progresso=lambda linhas: atualizar(linhas=linhas)
+                    )
+                # Publicação atômica: leitores nunca veem um arquivo incompleto
+                os.replace(temporario, destino)
+                atualizar(status='concluido')
+            except Exception as e:
+                logger.error(f"Erro na exportação {job_id}: {e}")
+                atualizar(status='erro', erro=str(e))
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+            finally:
+                db.session.remove()
+
+    _obter_executor().submit(executar)
+    return status_exportacao(job_id)
+
+
+def status_exportacao(job_id):
+    """
+    Estado de uma exportação. O arquivo em disco tem precedência, para que
+    qualquer processo do servidor responda por exportações já concluídas.
+    """
+    if arquivo_pronto(job_id):
+        return {'job_id': job_id, 'status': 'concluido'}
+
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job:
+            if _gerando_em_outro_processo(job_id):
+                return {'job_id': job_id, 'status': 'processando', 'linhas': None, 'erro': None}
+            return None
+        if job['status'] == 'concluido':
+            # Concluído, mas o arquivo já expirou do cache
+            _jobs.pop(job_id, None)
+            return None
+        return {
+            'job_id': job_id,
+            'status': job['status'],
+            'linhas': job['linhas'],
+            'erro': job['erro']
+        }
@@ -0,0 +1,310 @@
+"""
+Importação de registros de horas em massa
+Valida todas as linhas em uma passada (uma única consulta de funcionários)
+e grava as válidas com RegistroHora.gravar_em_massa. Planilhas CSV e XLSX
+são lidas em streaming e gravadas em lotes, com memória limitada ao lote.
+"""
+
+import csv
+import io
+import time
+from datetime import datetime, date
+
+from flask_app.models import db, Funcionario, RegistroHora, TAMANHO_LOTE_REGISTROS
+
+# Rejeições guardadas no relatório da importação (as demais são só contadas)
+MAX_REJEICOES_RELATORIO = 1000
+
+# Cabeçalhos aceitos nas planilhas para cada campo
+COLUNAS_PLANILHA = {
+    'funcionario_id': ('funcionario_id', 'id_funcionario', 'matricula'),
+    'funcionario': ('funcionario', 'nome', 'colaborador'),
+    'data': ('data', 'dia'),
+    'horas': ('horas', 'total_horas'),
+    'observacoes': ('observacoes', 'observacao', 'obs'),
+}
+
+# Separadores de CSV aceitos, na ordem em que são testados no cabeçalho
+SEPARADORES_CSV = (';', ',', '\t')
+
+# Contador do relatório de importação para cada status de gravação
+CONTADORES_STATUS = {'criado': 'criados', 'atualizado': 'atualizados', 'ignorado': 'ignorados'}
+
+
+def _converter_linha(item):
+    """Converte e valida uma linha isolada. Levanta ValueError com a mensagem do erro."""
+    if not isinstance(item, dict):
+        raise ValueError('Registro deve ser um objeto')
+
+    # Só inteiros (bool não) ou texto só de dígitos: int() aceitaria True, 1.9 e ' 3 '
+    funcionario_id = item.get('funcionario_id')
+    if isinstance(funcionario_id, str) and funcionario_id.isascii() and funcionario_id.isdigit():
+        funcionario_id = int(funcionario_id)
+    elif isinstance(funcionario_id, bool) or not isinstance(funcionario_id, int):
+        raise ValueError('funcionario_id inválido')
+
+    data = item.get('data')
+    if isinstance(data, datetime):
+        data = data.date()
+    elif not isinstance(data, date):
+        data = _converter_data(data)
+
+    horas = item.get('horas')
+    try:
+        # Planilhas brasileiras usam vírgula decimal
+        horas = float(horas.replace(',', '.') if isinstance(horas, str) else horas)
+    except (TypeError, ValueError):
+        raise ValueError('horas inválidas')
+    if horas <= 0 or horas > 24:
+        raise ValueError('horas deve ser entre 0 e 24')
+
+    observacoes = item.get('observacoes') or ''
+    return {
+        'funcionario_id': funcionario_id,
+        'data': data,
+        'horas': horas,
+        'observacoes': str(observacoes).strip()
+    }
+
+
+def _converter_data(valor):
+    texto = str(valor).strip()
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            pass
+    raise ValueError('data deve estar no formato AAAA-MM-DD ou DD/MM/AAAA')
+
+
+def validar_registros(itens, funcionarios_ativos=None):
+    """
+    Valida uma lista de registros {funcionario_id, data, horas, observacoes}
+
+    Funcionários são conferidos todos de uma vez (ou contra o conjunto
+    `funcionarios_ativos`, se informado). Quando a mesma chave
+    (funcionario_id, data) se repete, vale a última ocorrência.
+
+    Returns:
+        tuple: (linhas válidas, resultados por item {indice, status, erro})
+    """
+    resultados = [{'indice': i, 'status': None, 'erro': None} for i in range(len(itens))]
+    convertidas = {}
+
+    for i, item in enumerate(itens):
+        try:
+            convertidas[i] = _converter_linha(item)
+        except ValueError as e:
+            resultados[i].update(status='erro', erro=str(e))
+
+    ids = {linha['funcionario_id'] for linha in convertidas.values()}
+    ativos = funcionarios_ativos if funcionarios_ativos is not None else {
+        funcionario_id for (funcionario_id,) in db.session.query(Funcionario.id).filter(
+            Funcionario.id.in_(ids),
+            Funcionario.ativo == True
+        )
+    } if ids else set()
+
+    ultima_por_chave = {}
+    for i, linha in convertidas.items():
+        if linha['funcionario_id'] not in ativos:
+            resultados[i].update(status='erro', erro='Funcionário não encontrado ou inativo')
+            continue
+        chave = (linha['funcionario_id'], linha['data'])
+        if chave in ultima_por_chave:
+            resultados[ultima_por_chave[chave]].update(status='ignorado', erro=f'Substituído pelo item {i}')
+        ultima_por_chave[chave] = i
+
+    indices = sorted(ultima_por_chave.values())
+    return [(i, convertidas[i]) for i in indices], resultados
+
+
+def importar_registros(itens, funcionarios_ativos=None):
+    """
+    Valida e grava os registros na transação atual (o commit fica com quem chama)
+
+    Returns:
+        list: Resultado de cada item, com status criado, atualizado, ignorado ou erro
+    """
+    validas, resultados = validar_registros(itens, funcionarios_ativos)
+
+    if validas:
+        status = RegistroHora.gravar_em_massa([linha for _, linha in validas])
+        for (i, _), situacao in zip(validas, status):
+            resultados[i]['status'] = situacao
+
+    return resultados
+
+
+def _normalizar(texto):
+    return ' '.join(str(texto).split()).casefold()
+
+
+def _mapear_cabecalho(cabecalho):
+    """{campo: posição da coluna} a partir da primeira linha da planilha"""
+    posicoes = {_normalizar(nome): i for i, nome in enumerate(cabecalho) if nome is not None}
+    mapa = {}
+    for campo, nomes in COLUNAS_PLANILHA.items():
+        for nome in nomes:
+            if nome in posicoes:
+                mapa[campo] = posicoes[nome]
+                break
+
+    if 'data' not in mapa or 'horas' not in mapa:
+        raise ValueError('A planilha precisa das colunas data e horas')
+    if 'funcionario_id' not in mapa and 'funcionario' not in mapa:
+        raise ValueError('A planilha precisa da coluna funcionario (nome) ou funcionario_id')
+    return mapa
+
+
+def _linhas_como_dict(linhas):
+    """Converte as linhas (a primeira é o cabeçalho) em dicts com o número da linha"""
+    linhas = iter(linhas)
+    mapa = _mapear_cabecalho(next(linhas, None) or [])
+
+    for numero, linha in enumerate(linhas, start=2):
+        if not any(valor not in (None, '') for valor in linha):
+            continue
+        yield numero, {
+            campo: linha[posicao] if posicao < len(linha) else None
+            for campo, posicao in mapa.items()
+        }
+
+
+def _separador_pelo_cabecalho(amostra):
+    """
+    Separador com o qual a primeira linha tem as colunas esperadas. O ponto e
+    vírgula vem primeiro: é o que o Excel em pt-BR grava.
+    """
+    cabecalho = amostra.splitlines()[0] if amostra else ''
+    for separador in SEPARADORES_CSV:
+        try:
+            _mapear_cabecalho(next(csv.reader([cabecalho], delimiter=separador)))
+        except ValueError:
+            continue
+        return separador
+    raise ValueError(
+        'Não foi possível identificar o separador do CSV: use ponto e vírgula, '
+        'vírgula ou tabulação, com o cabeçalho (data, horas e funcionario ou '
+        'funcionario_id) na primeira linha'
+    )
+
+
+def ler_csv(arquivo):
+    """
+    Lê um CSV (arquivo binário) linha a linha. O separador (vírgula, ponto e
+    vírgula ou tabulação) é detectado pelo início do arquivo; se o Sniffer
+    falhar ou escolher um separador que não monta o cabeçalho, cada separador
+    é testado na primeira linha.
+    """
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    amostra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=''.join(SEPARADORES_CSV))
+        _mapear_cabecalho(next(csv.reader(amostra.splitlines()[:1], dialeto), []))
+    except (csv.Error, ValueError):
+        return _linhas_como_dict(csv.reader(texto, delimiter=_separador_pelo_cabecalho(amostra)))
+    return _linhas_como_dict(csv.reader(texto, dialeto))
+
+
+def ler_xlsx(arquivo):
+    """Lê a primeira aba de um XLSX em modo read_only, sem carregar a planilha inteira"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        yield from _linhas_como_dict(wb.worksheets[0].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def mapa_funcionarios():
+    """
+    Funcionários ativos por nome normalizado, montado uma vez por importação.
+    Nomes repetidos ficam ambíguos (None) e precisam de funcionario_id.
+
+    Returns:
+        tuple: ({nome: id ou None}, conjunto de ids ativos)
+    """
+    por_nome = {}
+    ativos = set()
+    for funcionario_id, nome in db.session.query(Funcionario.id, Funcionario.nome).filter(
+        Funcionario.ativo == True
+    ):
+        ativos.add(funcionario_id)
+        chave = _normalizar(nome)
+        por_nome[chave] = None if chave in por_nome else funcionario_id
+    return por_nome, ativos
+
+
+def importar_arquivo(arquivo, formato, tamanho_lote=TAMANHO_LOTE_REGISTROS, progresso=None):
+    """
+    Importa uma planilha CSV ou XLSX em lotes de `tamanho_lote` linhas,
+    com commit por lote: a memória usada não depende do tamanho do arquivo
+
+    Args:
+        arquivo: Arquivo binário (aberto pelo chamador)
+        formato: 'csv' ou 'xlsx'
+        progresso: Função chamada a cada lote com o relatório parcial
+
+    Returns:
+        dict: linhas, criados, atualizados, ignorados, rejeitados, rejeicoes
+        (linha e erro), segundos e linhas_por_segundo
+    """
+    if formato not in ('csv', 'xlsx'):
+        raise ValueError('Formato deve ser csv ou xlsx')
+
+    inicio = time.monotonic()
+    por_nome, ativos = mapa_funcionarios()
+    relatorio = {
+        'linhas': 0, 'criados': 0, 'atualizados': 0, 'ignorados': 0,
+        'rejeitados': 0, 'rejeicoes': [], 'segundos': 0, 'linhas_por_segundo': 0
+    }
+
+    def rejeitar(numero, erro):
+        relatorio['rejeitados'] += 1
+        if len(relatorio['rejeicoes']) < MAX_REJEICOES_RELATORIO:
+            relatorio['rejeicoes'].append({'linha': numero, 'erro': erro})
+
+    def gravar(lote):
+        resultados = importar_registros([item for _, item in lote], ativos)
+        db.session.commit()
+
+        for (numero, _), resultado in zip(lote, resultados):
+            if resultado['status'] == 'erro':
+                rejeitar(numero, resultado['erro'])
+            else:
+                relatorio[CONTADORES_STATUS[resultado['status']]] += 1
+
+        segundos = time.monotonic() - inicio
+        relatorio['segundos'] = round(segundos, 2)
+        relatorio['linhas_por_segundo'] = round(relatorio['linhas'] / segundos) if segundos else 0
+        if progresso:
+            progresso(relatorio)
+
+    linhas = ler_csv(arquivo) if formato == 'csv' else ler_xlsx(arquivo)
+    lote = []
+    try:
+        for numero, item in linhas:
+            relatorio['linhas'] += 1
+
+            if item.get('funcionario_id') in (None, ''):
+                nome = _normalizar(item.get('funcionario') or '')
+                if por_nome.get(nome) is None:
+                    motivo = 'ambíguo' if nome in por_nome else 'não encontrado'
+                    rejeitar(numero, f'Funcionário {motivo}: {item.get("funcionario")}')
+                    continue
+                item['funcionario_id'] = por_nome[nome]
+
+            lote.append((numero, item))
+            if len(lote) >= tamanho_lote:
+                gravar(lote)
+                lote = []
+
+        gravar(lote)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return relatorio
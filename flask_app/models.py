@@ -1,8 +1,99 @@
-﻿from flask_sqlalchemy import SQLAlchemy
+import logging
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, tuple_
+from sqlalchemy.orm import Session
 from datetime import datetime, date, timedelta
+from flask_app.cache import chave_horas_mes, invalidar, obter_cache, usa_geracoes
 
 db = SQLAlchemy()
 
+logger = logging.getLogger(__name__)
+
+# Quantidade de resumos gravados por upsert na geração por período
+TAMANHO_LOTE_RESUMOS = 1000
+
+# Quantidade de registros de horas gravados por instrução na gravação em massa
+TAMANHO_LOTE_REGISTROS = 1000
+
+
+def insert_com_conflito():
+    """Retorna o insert com suporte a ON CONFLICT do dialeto atual, ou None"""
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+# Namespace dos advisory locks de recálculo de resumos (pg_advisory_xact_lock(namespace, funcionario_id))
+NAMESPACE_TRAVA_RESUMOS = 7301
+
+
+def travar_funcionarios(funcionario_ids):
+    """
+    Serializa o recálculo de resumos por funcionário até o fim da transação
+    
+    Os consolidados mensal e anual são somas relidas do banco: sem a trava, duas
+    transações gravando dias diferentes do mesmo funcionário (READ COMMITTED no
+    PostgreSQL) não veem o dia uma da outra e a última a confirmar grava um total
+    desatualizado. Com a trava, a segunda espera o commit da primeira e suas
+    consultas seguintes já leem o dia confirmado.
+    
+    As travas são pedidas em ordem crescente de id em uma única instrução, para
+    não haver deadlock entre transações. No SQLite não há o que fazer: a escrita
+    já é serializada pelo lock do banco, adquirido antes do recálculo.
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    
+    ids = sorted({int(funcionario_id) for funcionario_id in funcionario_ids})
+    if not ids:
+        return
+    
+    # unnest devolve as linhas na ordem do array
+    db.session.execute(
+        db.text(
+            'SELECT pg_advisory_xact_lock(:namespace, funcionario_id) '
+            'FROM unnest(CAST(:ids AS integer[])) AS funcionario_id'
+        ),
+        {'namespace': NAMESPACE_TRAVA_RESUMOS, 'ids': ids}
+    )
+
+
+def upsert_em_massa(tabela, linhas, colunas_chave, colunas_atualizar):
+    """
+    Grava `linhas` em `tabela` com um único INSERT ... ON CONFLICT DO UPDATE
+    sobre `colunas_chave` (PostgreSQL e SQLite). Outros dialetos caem para
+    UPDATE seguido de INSERT linha a linha.
+    """
+    if not linhas:
+        return
+    
+    insert = insert_com_conflito()
+    if insert is not None:
+        stmt = insert(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(colunas_chave),
+            set_={coluna: stmt.excluded[coluna] for coluna in colunas_atualizar}
+        )
+        db.session.execute(stmt, linhas)
+        return
+    
+    for linha in linhas:
+        atualizadas = db.session.execute(
+            tabela.update().where(
+                *[tabela.c[coluna] == linha[coluna] for coluna in colunas_chave]
+            ).values({coluna: linha[coluna] for coluna in colunas_atualizar})
+        ).rowcount
+        if not atualizadas:
+            db.session.execute(tabela.insert(), linha)
+
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
     
@@ -24,6 +115,7 @@ class AreaAtuacao(db.Model):
     descricao = db.Column(db.Text)
     ativo = db.Column(db.Boolean, default=True)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
         return f'<AreaAtuacao {self.nome}>'
@@ -37,7 +129,9 @@ class Cargo(db.Model):
     salario_base = db.Column(db.Float)
     ativo = db.Column(db.Boolean, default=True)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Relacionamentos
     area = db.relationship('AreaAtuacao', backref='cargos')
     
     def __repr__(self):
@@ -48,34 +142,202 @@ class Funcionario(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
+    
+    # Relacionamentos com outras tabelas
     cargo_id = db.Column(db.Integer, db.ForeignKey('cargos.id'), nullable=True)
     area_id = db.Column(db.Integer, db.ForeignKey('areas_atuacao.id'), nullable=True)
+    
+    # Status
     ativo = db.Column(db.Boolean, default=True)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Relacionamentos
     cargo = db.relationship('Cargo', backref='funcionarios')
     area = db.relationship('AreaAtuacao', backref='funcionarios')
     
+    # Listagem paginada de ativos por nome: varredura de faixa no índice.
+    # Busca por prefixo sem diferenciar maiúsculas: índice em lower(nome), com
+    # text_pattern_ops no PostgreSQL para o LIKE 'prefixo%' usá-lo em qualquer collation
+    __table_args__ = (
+        db.Index('idx_funcionarios_ativo_nome', 'ativo', 'nome'),
+        db.Index(
+            'idx_funcionarios_ativo_nome_minusculo', 'ativo', db.func.lower(nome).label('nome_minusculo'),
+            postgresql_ops={'nome_minusculo': 'text_pattern_ops'}
+        ),
+    )
+    
     def __repr__(self):
         return f'<Funcionario {self.nome}>'
+    
+    @classmethod
+    def buscar_ativos(cls, termo=None, cargo_id=None, area_id=None):
+        """Funcionários ativos cujo nome começa com `termo` (sem diferenciar maiúsculas)"""
+        query = cls.query.filter(cls.ativo == True)
+        
+        if termo:
+            # lower(nome) LIKE 'prefixo%' com o prefixo já minúsculo: é o que o índice
+            # idx_funcionarios_ativo_nome_minusculo atende (istartswith gera lower(:p) e não usa)
+            prefixo = termo.lower()
+            nome = db.func.lower(cls.nome)
+            query = query.filter(nome.startswith(prefixo, autoescape=True))
+            if db.session.get_bind().dialect.name == 'sqlite':
+                # O SQLite não usa índice de expressão no LIKE, só em comparações
+                query = query.filter(nome >= prefixo, nome < prefixo[:-1] + chr(ord(prefixo[-1]) + 1))
+        if cargo_id:
+            query = query.filter(cls.cargo_id == cargo_id)
+        if area_id:
+            query = query.filter(cls.area_id == area_id)
+        
+        return query
+    
+    @classmethod
+    def paginar_por_nome(cls, query, por_pagina, depois=None):
+        """
+        Página de funcionários em ordem de nome, por cursor (nome, id)
+        
+        Args:
+            depois: id do último funcionário da página anterior
+        
+        Returns:
+            tuple: (funcionarios, id do último da página ou None se não houver próxima)
+        """
+        if depois:
+            nome = db.session.query(cls.nome).filter(cls.id == depois).scalar_subquery()
+            query = query.filter(tuple_(cls.nome, cls.id) > tuple_(nome, depois))
+        
+        funcionarios = query.order_by(cls.nome, cls.id).limit(por_pagina + 1).all()
+        proximo = funcionarios[por_pagina - 1].id if len(funcionarios) > por_pagina else None
+        return funcionarios[:por_pagina], proximo
 
 class RegistroHora(db.Model):
     __tablename__ = 'registros_horas'
     
     id = db.Column(db.Integer, primary_key=True)
-    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=False)
-    data = db.Column(db.Date, nullable=False)
-    horas = db.Column(db.Float, nullable=False)
+    # active_history: mantém o valor antigo para atualizar o resumo do dia anterior
+    funcionario_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=False),
+        active_history=True
+    )
+    data = db.column_property(db.Column(db.Date, nullable=False), active_history=True)
+    horas = db.Column(db.Float, nullable=False)  # Horas em formato decimal
     observacoes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Relacionamentos
     funcionario = db.relationship('Funcionario', backref='registros_horas')
     
+    # Índice para melhorar performance
+    __table_args__ = (
+        # Um registro por funcionário por dia (alvo do INSERT ... ON CONFLICT)
+        db.UniqueConstraint('funcionario_id', 'data', name='unique_registro_funcionario_data'),
+        # Paginação por cursor (data, id) na listagem de relatórios
+        db.Index('idx_registros_data_id', 'data', 'id'),
+    )
+    
     def __repr__(self):
-        return f'<RegistroHora {self.data} - {self.horas}h>'
+        return f'<RegistroHora {self.funcionario.nome if self.funcionario else "N/A"} - {self.data} - {self.horas}h>'
+    
+    @classmethod
+    def registrar(cls, funcionario_id, data, horas, observacoes=''):
+        """
+        Cria ou atualiza o registro do funcionário no dia com uma única
+        instrução INSERT ... ON CONFLICT DO UPDATE, segura contra envios simultâneos
+        
+        Returns:
+            bool: True se o registro foi criado, False se já existia e foi atualizado
+        """
+        insert = insert_com_conflito()
+        if insert is None:
+            linha = {'funcionario_id': funcionario_id, 'data': data, 'horas': horas, 'observacoes': observacoes}
+            return cls.gravar_em_massa([linha]) == ['criado']
+        
+        postgresql = db.session.get_bind().dialect.name == 'postgresql'
+        if not postgresql:
+            # Sem marcador do banco: a consulta prévia diz se o registro já existia,
+            # como em gravar_em_massa (no SQLite as escritas são serializadas)
+            existia = db.session.query(
+                db.exists().where(cls.funcionario_id == funcionario_id, cls.data == data)
+            ).scalar()
+        
+        agora = datetime.utcnow()
+        stmt = insert(cls.__table__).values(
+            funcionario_id=funcionario_id,
+            data=data,
+            horas=horas,
+            observacoes=observacoes,
+            created_at=agora,
+            updated_at=agora
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['funcionario_id', 'data'],
+            set_={
+                'horas': stmt.excluded.horas,
+                'observacoes': stmt.excluded.observacoes,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        
+        if postgresql:
+            # xmax = 0 só na linha recém-inserida; numa atualização ele guarda a transação
+            criado = db.session.execute(
+                stmt.returning(db.literal_column('(xmax = 0)', db.Boolean))
+            ).scalar_one()
+        else:
+            db.session.execute(stmt)
+            criado = not existia
+        
+        # Instruções Core não passam pelos eventos da sessão
+        recalcular_dias({(funcionario_id, data)})
+        return criado
+    
+    @classmethod
+    def gravar_em_massa(cls, linhas, tamanho_lote=TAMANHO_LOTE_REGISTROS):
+        """
+        Grava linhas {funcionario_id, data, horas, observacoes} já validadas,
+        atualizando o registro do funcionário no dia quando ele já existe
+        
+        Cada lote é um INSERT ... ON CONFLICT DO UPDATE em massa, sem carregar
+        objetos na sessão; a consulta das chaves existentes serve só para
+        informar o que foi criado ou atualizado. Os resumos dos dias tocados
+        são atualizados na mesma transação.
+        
+        Returns:
+            list: 'criado' ou 'atualizado' para cada linha, na mesma ordem
+        """
+        agora = datetime.utcnow()
+        resultados = []
+        
+        # Todos os funcionários travados de uma vez, em ordem, antes do primeiro
+        # lote: os recálculos dos lotes só pedem travas que a transação já tem, e
+        # dois envios em massa sobrepostos não se travam mutuamente
+        if not resumos_em_fila():
+            travar_funcionarios(linha['funcionario_id'] for linha in linhas)
+        
+        for i in range(0, len(linhas), tamanho_lote):
+            lote = linhas[i:i + tamanho_lote]
+            chaves = [(linha['funcionario_id'], linha['data']) for linha in lote]
+            
+            existentes = set(db.session.query(cls.funcionario_id, cls.data).filter(
+                tuple_(cls.funcionario_id, cls.data).in_(chaves)
+            ).all())
+            
+            upsert_em_massa(
+                cls.__table__,
+                [dict(linha, created_at=agora, updated_at=agora) for linha in lote],
+                colunas_chave=('funcionario_id', 'data'),
+                colunas_atualizar=('horas', 'observacoes', 'updated_at')
+            )
+            
+            # Instruções Core não passam pelos eventos da sessão
+            recalcular_dias(set(chaves))
+            resultados += ['atualizado' if chave in existentes else 'criado' for chave in chaves]
+        
+        return resultados
 
 class ResumoDiario(db.Model):
+    """Modelo para armazenar resumos diários consolidados"""
     __tablename__ = 'resumos_diarios'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -83,49 +345,854 @@ class ResumoDiario(db.Model):
     cargo_id = db.Column(db.Integer, db.ForeignKey('cargos.id'), nullable=True)
     area_id = db.Column(db.Integer, db.ForeignKey('areas_atuacao.id'), nullable=True)
     data = db.Column(db.Date, nullable=False, index=True)
+    
+    # Totais do dia
     total_horas = db.Column(db.Float, default=0)
     total_registros = db.Column(db.Integer, default=0)
+    
+    # Controle
     processado_em = db.Column(db.DateTime, default=datetime.utcnow)
     atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Relacionamentos
     funcionario = db.relationship('Funcionario', backref='resumos_diarios')
     cargo = db.relationship('Cargo', backref='resumos_diarios')
     area = db.relationship('AreaAtuacao', backref='resumos_diarios')
     
+    # Índice único por funcionário e data
+    __table_args__ = (
+        db.UniqueConstraint('funcionario_id', 'data', name='unique_funcionario_data'),
+        db.Index('idx_data_funcionario', 'data', 'funcionario_id'),
+    )
+    
     @classmethod
     def gerar_resumo_dia(cls, data_resumo):
+        """Gera resumos diários para todos os funcionários em uma data específica"""
+        totais = cls._agregar_registros(RegistroHora.data == data_resumo)
+        resumos_criados, _ = cls._upsert_totais(totais)
+        
+        db.session.commit()
+        return resumos_criados
+    
+    @classmethod
+    def _agregar_registros(cls, *filtros):
+        """Soma horas e registros por (funcionário, data) em uma única query agregada"""
+        return [cls._linha_para_total(linha) for linha in cls._query_agregada(*filtros)]
+    
+    @staticmethod
+    def _query_agregada(*filtros):
+        """Query agrupada por (funcionário, data) com cargo e área do funcionário"""
+        return db.session.query(
+            RegistroHora.funcionario_id,
+            RegistroHora.data,
+            Funcionario.cargo_id,
+            Funcionario.area_id,
+            db.func.sum(RegistroHora.horas).label('total_horas'),
+            db.func.count(RegistroHora.id).label('total_registros')
+        ).join(
+            Funcionario, Funcionario.id == RegistroHora.funcionario_id
+        ).filter(*filtros).group_by(
+            RegistroHora.funcionario_id,
+            RegistroHora.data,
+            Funcionario.cargo_id,
+            Funcionario.area_id
+        )
+    
+    @staticmethod
+    def _linha_para_total(linha):
+        return {
+            'funcionario_id': linha.funcionario_id,
+            'data': linha.data,
+            'cargo_id': linha.cargo_id,
+            'area_id': linha.area_id,
+            'total_horas': linha.total_horas or 0,
+            'total_registros': linha.total_registros
+        }
+    
+    @classmethod
+    def _upsert_totais(cls, totais, consolidar=True):
+        """
+        Grava os totais agregados com um único INSERT ... ON CONFLICT sobre
+        a constraint unique_funcionario_data.
+        
+        Args:
+            consolidar (bool): Recalcular já os consolidados mensais e anuais dos
+                meses tocados. Quem grava em lotes passa False e consolida uma
+                vez no fim, para não somar o mesmo mês a cada lote.
+        
+        Returns:
+            tuple: (resumos criados, resumos atualizados)
+        """
+        if not totais:
+            return 0, 0
+        
+        # Chaves já existentes - uma query para separar criados de atualizados
+        datas = {total['data'] for total in totais}
+        funcionarios = {total['funcionario_id'] for total in totais}
+        existentes = set(
+            db.session.query(cls.funcionario_id, cls.data).filter(
+                cls.data.between(min(datas), max(datas)),
+                cls.funcionario_id.in_(funcionarios)
+            ).all()
+        )
+        resumos_atualizados = sum(
+            1 for total in totais if (total['funcionario_id'], total['data']) in existentes
+        )
+        resumos_criados = len(totais) - resumos_atualizados
+        
+        agora = datetime.utcnow()
+        linhas = [dict(total, processado_em=agora, atualizado_em=agora) for total in totais]
+        
+        upsert_em_massa(
+            cls.__table__, linhas,
+            colunas_chave=('funcionario_id', 'data'),
+            colunas_atualizar=('cargo_id', 'area_id', 'total_horas', 'total_registros', 'atualizado_em')
+        )
+        
+        # Manter os consolidados mensais e anuais dos meses afetados
+        if consolidar:
+            ResumoMensal.atualizar_meses(cls._meses_dos_totais(totais))
+        
+        return resumos_criados, resumos_atualizados
+    
+    @staticmethod
+    def _meses_dos_totais(totais):
+        return {(total['funcionario_id'], total['data'].year, total['data'].month) for total in totais}
+    
+    @classmethod
+    def gerar_resumos_periodo(cls, data_inicio, data_fim=None, tamanho_lote=TAMANHO_LOTE_RESUMOS, progresso=None):
+        """
+        Gera resumos para um período específico em uma única passada
+        
+        Args:
+            data_inicio (date): Primeiro dia do período
+            data_fim (date): Último dia do período (padrão: data_inicio)
+            tamanho_lote (int): Quantidade de resumos gravados por upsert
+            progresso (callable): Chamado após cada lote com
+                (resumos_processados, resumos_criados, resumos_atualizados)
+        
+        Returns:
+            int: Quantidade de resumos criados
+        """
+        if not data_fim:
+            data_fim = data_inicio
+        
+        # Ordenado por funcionário e dia: cada lote cobre poucos funcionários e
+        # a consulta de existentes de _upsert_totais fica restrita a eles
+        query = cls._query_agregada(
+            RegistroHora.data >= data_inicio,
+            RegistroHora.data <= data_fim
+        ).order_by(RegistroHora.funcionario_id, RegistroHora.data).yield_per(tamanho_lote)
+        
         resumos_criados = 0
-        registros = RegistroHora.query.filter_by(data=data_resumo).all()
-        
-        funcionarios_horas = {}
-        for registro in registros:
-            if registro.funcionario_id not in funcionarios_horas:
-                funcionarios_horas[registro.funcionario_id] = {
-                    'total_horas': 0,
-                    'total_registros': 0,
-                    'funcionario': registro.funcionario
-                }
-            funcionarios_horas[registro.funcionario_id]['total_horas'] += registro.horas
-            funcionarios_horas[registro.funcionario_id]['total_registros'] += 1
+        resumos_atualizados = 0
+        lote = []
+        # Consolidados recalculados uma vez no fim do período, não a cada lote
+        meses = set()
         
-        for funcionario_id, dados in funcionarios_horas.items():
-            funcionario = dados['funcionario']
-            resumo = cls.query.filter_by(funcionario_id=funcionario_id, data=data_resumo).first()
-            
-            if not resumo:
-                resumo = cls(funcionario_id=funcionario_id, data=data_resumo)
-                db.session.add(resumo)
-                resumos_criados += 1
-            
-            resumo.total_horas = dados['total_horas']
-            resumo.total_registros = dados['total_registros']
-            resumo.cargo_id = funcionario.cargo_id
-            resumo.area_id = funcionario.area_id
-            resumo.atualizado_em = datetime.utcnow()
+        def gravar_lote():
+            nonlocal resumos_criados, resumos_atualizados
+            criados, atualizados = cls._upsert_totais(lote, consolidar=False)
+            meses.update(cls._meses_dos_totais(lote))
+            resumos_criados += criados
+            resumos_atualizados += atualizados
+            lote.clear()
+            if progresso:
+                progresso(resumos_criados + resumos_atualizados, resumos_criados, resumos_atualizados)
+        
+        for linha in query:
+            lote.append(cls._linha_para_total(linha))
+            if len(lote) >= tamanho_lote:
+                gravar_lote()
+        
+        if lote:
+            gravar_lote()
         
+        ResumoMensal.atualizar_meses(meses)
         db.session.commit()
         return resumos_criados
     
+    @classmethod
+    def atualizar_resumos(cls, chaves):
+        """
+        Recalcula os resumos das chaves (funcionario_id, data) informadas
+        na transação atual, removendo os que ficaram sem registros
+        """
+        chaves = list(chaves)
+        if not chaves:
+            return
+        
+        # Antes de reler os registros: os totais só valem se ninguém mais
+        # estiver recalculando o mesmo funcionário
+        travar_funcionarios(funcionario_id for funcionario_id, _ in chaves)
+        
+        totais = []
+        for i in range(0, len(chaves), TAMANHO_LOTE_RESUMOS):
+            lote = chaves[i:i + TAMANHO_LOTE_RESUMOS]
+            totais += cls._agregar_registros(
+                tuple_(RegistroHora.funcionario_id, RegistroHora.data).in_(lote)
+            )
+        cls._upsert_totais(totais)
+        
+        # Dias que ficaram sem registros não devem manter resumo
+        vazias = set(chaves) - {(total['funcionario_id'], total['data']) for total in totais}
+        vazias = list(vazias)
+        for i in range(0, len(vazias), TAMANHO_LOTE_RESUMOS):
+            db.session.execute(
+                cls.__table__.delete().where(
+                    tuple_(cls.funcionario_id, cls.data).in_(vazias[i:i + TAMANHO_LOTE_RESUMOS])
+                )
+            )
+        if vazias:
+            ResumoMensal.atualizar_meses({
+                (funcionario_id, data.year, data.month) for funcionario_id, data in vazias
+            })
+    
     def __repr__(self):
         funcionario_nome = self.funcionario.nome if self.funcionario else "N/A"
         return f'<ResumoDiario {funcionario_nome} - {self.data} - {self.total_horas}h>'
+
+
+class ResumoMensal(db.Model):
+    """Consolidado mensal por funcionário, mantido a partir de ResumoDiario"""
+    __tablename__ = 'resumos_mensais'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=False)
+    cargo_id = db.Column(db.Integer, db.ForeignKey('cargos.id'), nullable=True)
+    area_id = db.Column(db.Integer, db.ForeignKey('areas_atuacao.id'), nullable=True)
+    ano = db.Column(db.Integer, nullable=False)
+    mes = db.Column(db.Integer, nullable=False)
+    
+    # Totais do mês
+    total_horas = db.Column(db.Float, default=0)
+    total_registros = db.Column(db.Integer, default=0)
+    dias_trabalhados = db.Column(db.Integer, default=0)
+    
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relacionamentos
+    funcionario = db.relationship('Funcionario')
+    cargo = db.relationship('Cargo')
+    area = db.relationship('AreaAtuacao')
+    
+    __table_args__ = (
+        db.UniqueConstraint('funcionario_id', 'ano', 'mes', name='unique_funcionario_ano_mes'),
+        db.Index('idx_mensal_ano_mes', 'ano', 'mes'),
+    )
+    
+    @classmethod
+    def atualizar_meses(cls, chaves):
+        """Recalcula os meses (funcionario_id, ano, mes) a partir dos resumos diários"""
+        chaves = list(chaves)
+        travar_funcionarios(funcionario_id for funcionario_id, _, _ in chaves)
+        invalidar_no_commit(*{chave_horas_mes(ano, mes) for _, ano, mes in chaves})
+        for i in range(0, len(chaves), TAMANHO_LOTE_RESUMOS):
+            lote = set(chaves[i:i + TAMANHO_LOTE_RESUMOS])
+            inicio = min(date(ano, mes, 1) for _, ano, mes in lote)
+            fim = max(_ultimo_dia_mes(ano, mes) for _, ano, mes in lote)
+            
+            ano_col = db.extract('year', ResumoDiario.data)
+            mes_col = db.extract('month', ResumoDiario.data)
+            query = db.session.query(
+                ResumoDiario.funcionario_id,
+                ano_col.label('ano'),
+                mes_col.label('mes'),
+                Funcionario.cargo_id,
+                Funcionario.area_id,
+                db.func.sum(ResumoDiario.total_horas).label('total_horas'),
+                db.func.sum(ResumoDiario.total_registros).label('total_registros'),
+                db.func.count(ResumoDiario.id).label('dias_trabalhados')
+            ).join(
+                Funcionario, Funcionario.id == ResumoDiario.funcionario_id
+            ).filter(
+                ResumoDiario.funcionario_id.in_({funcionario_id for funcionario_id, _, _ in lote}),
+                ResumoDiario.data.between(inicio, fim)
+            ).group_by(
+                ResumoDiario.funcionario_id, ano_col, mes_col, Funcionario.cargo_id, Funcionario.area_id
+            )
+            
+            agora = datetime.utcnow()
+            linhas = []
+            for linha in query:
+                chave = (linha.funcionario_id, int(linha.ano), int(linha.mes))
+                if chave in lote:
+                    linhas.append({
+                        'funcionario_id': chave[0],
+                        'ano': chave[1],
+                        'mes': chave[2],
+                        'cargo_id': linha.cargo_id,
+                        'area_id': linha.area_id,
+                        'total_horas': linha.total_horas or 0,
+                        'total_registros': linha.total_registros or 0,
+                        'dias_trabalhados': linha.dias_trabalhados,
+                        'atualizado_em': agora
+                    })
+            
+            upsert_em_massa(
+                cls.__table__, linhas,
+                colunas_chave=('funcionario_id', 'ano', 'mes'),
+                colunas_atualizar=('cargo_id', 'area_id', 'total_horas', 'total_registros',
+                                   'dias_trabalhados', 'atualizado_em')
+            )
+            
+            # Meses que ficaram sem resumos diários
+            vazias = list(lote - {(l['funcionario_id'], l['ano'], l['mes']) for l in linhas})
+            if vazias:
+                db.session.execute(
+                    cls.__table__.delete().where(tuple_(cls.funcionario_id, cls.ano, cls.mes).in_(vazias))
+                )
+        
+        ResumoAnual.atualizar_anos({(funcionario_id, ano) for funcionario_id, ano, _ in chaves})
+    
+    def __repr__(self):
+        return f'<ResumoMensal {self.funcionario_id} - {self.mes:02d}/{self.ano} - {self.total_horas}h>'
+
+
+class ResumoAnual(db.Model):
+    """Consolidado anual por funcionário, mantido a partir de ResumoMensal"""
+    __tablename__ = 'resumos_anuais'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=False)
+    cargo_id = db.Column(db.Integer, db.ForeignKey('cargos.id'), nullable=True)
+    area_id = db.Column(db.Integer, db.ForeignKey('areas_atuacao.id'), nullable=True)
+    ano = db.Column(db.Integer, nullable=False, index=True)
+    
+    # Totais do ano
+    total_horas = db.Column(db.Float, default=0)
+    total_registros = db.Column(db.Integer, default=0)
+    dias_trabalhados = db.Column(db.Integer, default=0)
+    
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relacionamentos
+    funcionario = db.relationship('Funcionario')
+    cargo = db.relationship('Cargo')
+    area = db.relationship('AreaAtuacao')
+    
+    __table_args__ = (
+        db.UniqueConstraint('funcionario_id', 'ano', name='unique_funcionario_ano'),
+    )
+    
+    @classmethod
+    def atualizar_anos(cls, chaves):
+        """Recalcula os anos (funcionario_id, ano) somando até 12 linhas de ResumoMensal"""
+        chaves = list(chaves)
+        travar_funcionarios(funcionario_id for funcionario_id, _ in chaves)
+        for i in range(0, len(chaves), TAMANHO_LOTE_RESUMOS):
+            lote = chaves[i:i + TAMANHO_LOTE_RESUMOS]
+            query = db.session.query(
+                ResumoMensal.funcionario_id,
+                ResumoMensal.ano,
+                Funcionario.cargo_id,
+                Funcionario.area_id,
+                db.func.sum(ResumoMensal.total_horas).label('total_horas'),
+                db.func.sum(ResumoMensal.total_registros).label('total_registros'),
+                db.func.sum(ResumoMensal.dias_trabalhados).label('dias_trabalhados')
+            ).join(
+                Funcionario, Funcionario.id == ResumoMensal.funcionario_id
+            ).filter(
+                tuple_(ResumoMensal.funcionario_id, ResumoMensal.ano).in_(lote)
+            ).group_by(
+                ResumoMensal.funcionario_id, ResumoMensal.ano, Funcionario.cargo_id, Funcionario.area_id
+            )
+            
+            agora = datetime.utcnow()
+            linhas = [
+                {
+                    'funcionario_id': linha.funcionario_id,
+                    'ano': linha.ano,
+                    'cargo_id': linha.cargo_id,
+                    'area_id': linha.area_id,
+                    'total_horas': linha.total_horas or 0,
+                    'total_registros': linha.total_registros or 0,
+                    'dias_trabalhados': linha.dias_trabalhados or 0,
+                    'atualizado_em': agora
+                }
+                for linha in query
+            ]
+            
+            upsert_em_massa(
+                cls.__table__, linhas,
+                colunas_chave=('funcionario_id', 'ano'),
+                colunas_atualizar=('cargo_id', 'area_id', 'total_horas', 'total_registros',
+                                   'dias_trabalhados', 'atualizado_em')
+            )
+            
+            vazias = list(set(lote) - {(l['funcionario_id'], l['ano']) for l in linhas})
+            if vazias:
+                db.session.execute(
+                    cls.__table__.delete().where(tuple_(cls.funcionario_id, cls.ano).in_(vazias))
+                )
+    
+    def __repr__(self):
+        return f'<ResumoAnual {self.funcionario_id} - {self.ano} - {self.total_horas}h>'
+
+
+def _ultimo_dia_mes(ano, mes):
+    if mes == 12:
+        return date(ano, 12, 31)
+    return date(ano, mes + 1, 1) - timedelta(days=1)
+
+
+class DiaPendente(db.Model):
+    """Fila persistente de dias cujo resumo precisa ser recalculado"""
+    __tablename__ = 'dias_pendentes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+    marcado_em = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('funcionario_id', 'data', name='unique_pendente_funcionario_data'),
+    )
+    
+    @classmethod
+    def marcar(cls, chaves):
+        """Marca as chaves (funcionario_id, data) como pendentes na transação atual"""
+        agora = datetime.utcnow()
+        linhas = [
+            {'funcionario_id': funcionario_id, 'data': data, 'marcado_em': agora}
+            for funcionario_id, data in chaves
+        ]
+        # Remarcar atualiza marcado_em para o worker não descartar a nova alteração
+        upsert_em_massa(
+            cls.__table__, linhas,
+            colunas_chave=('funcionario_id', 'data'),
+            colunas_atualizar=('marcado_em',)
+        )
+    
+    @classmethod
+    def processar_lote(cls, tamanho_lote=TAMANHO_LOTE_RESUMOS):
+        """
+        Recalcula um lote de dias pendentes e os remove da fila
+        
+        No PostgreSQL as linhas da fila são travadas com FOR UPDATE SKIP LOCKED,
+        então vários workers drenam a fila sem pegar o mesmo dia. Isso não basta
+        para os consolidados: dois workers com dias diferentes do mesmo
+        funcionário e mês somariam o mês cada um sem ver o dia do outro. Por isso
+        os funcionários do lote são travados (travar_funcionarios) antes do
+        recálculo, e um worker espera o commit do outro.
+        
+        Returns:
+            int: Quantidade de dias processados
+        """
+        pendentes = db.session.query(
+            cls.id, cls.funcionario_id, cls.data, cls.marcado_em
+        ).order_by(cls.marcado_em).limit(tamanho_lote).with_for_update(skip_locked=True).all()
+        
+        if not pendentes:
+            db.session.commit()
+            return 0
+        
+        travar_funcionarios(p.funcionario_id for p in pendentes)
+        ResumoDiario.atualizar_resumos({(p.funcionario_id, p.data) for p in pendentes})
+        
+        # Só remove o que não foi remarcado enquanto o lote era processado
+        db.session.execute(
+            cls.__table__.delete().where(
+                cls.id == db.bindparam('b_id'),
+                cls.marcado_em == db.bindparam('b_marcado_em')
+            ),
+            [{'b_id': p.id, 'b_marcado_em': p.marcado_em} for p in pendentes]
+        )
+        db.session.commit()
+        return len(pendentes)
+    
+    def __repr__(self):
+        return f'<DiaPendente {self.funcionario_id} - {self.data}>'
+
+
+# Manutenção incremental dos resumos: cada flush que grava RegistroHora
+# recalcula apenas os dias tocados, na mesma transação (ou os enfileira
+# em DiaPendente quando RESUMOS_MODO = 'fila')
+@event.listens_for(Session, 'before_flush')
+def _coletar_dias_alterados(session, flush_context, instances):
+    chaves = session.info.setdefault('resumos_pendentes', set())
+    
+    for registro in session.new:
+        if isinstance(registro, RegistroHora):
+            chaves.add((registro.funcionario_id, registro.data))
+    
+    for registro in session.deleted:
+        if isinstance(registro, RegistroHora):
+            chaves.add((registro.funcionario_id, registro.data))
+    
+    for registro in session.dirty:
+        if isinstance(registro, RegistroHora) and session.is_modified(registro):
+            estado = db.inspect(registro)
+            funcionario_hist = estado.attrs.funcionario_id.history
+            data_hist = estado.attrs.data.history
+            chaves.add((registro.funcionario_id, registro.data))
+            # Se o registro mudou de funcionário ou de dia, o dia antigo também muda
+            for funcionario_id in funcionario_hist.deleted or [registro.funcionario_id]:
+                for data_antiga in data_hist.deleted or [registro.data]:
+                    chaves.add((funcionario_id, data_antiga))
+
+
+def resumos_em_fila():
+    """Em modo 'fila' os dias são apenas marcados e o worker recalcula depois"""
+    return has_app_context() and current_app.config.get('RESUMOS_MODO') == 'fila'
+
+
+def recalcular_dias(chaves):
+    """
+    Atualiza os resumos dos dias (funcionario_id, data) alterados na transação
+    atual. Usada pelos eventos da sessão e por gravações diretas na tabela.
+    """
+    if resumos_em_fila():
+        DiaPendente.marcar(chaves)
+    else:
+        ResumoDiario.atualizar_resumos(chaves)
+
+
+@event.listens_for(Session, 'after_flush')
+def _atualizar_dias_alterados(session, flush_context):
+    chaves = session.info.pop('resumos_pendentes', None)
+    if chaves:
+        recalcular_dias(chaves)
+
+
+# Os resumos guardam o cargo e a área do funcionário, pelos quais os relatórios
+# agrupam as horas: quando o cadastro muda, os resumos já gravados acompanham
+@event.listens_for(Session, 'before_flush')
+def _coletar_lotacao_alterada(session, flush_context, instances):
+    for funcionario in session.dirty:
+        if not isinstance(funcionario, Funcionario) or not session.is_modified(funcionario):
+            continue
+        estado = db.inspect(funcionario)
+        if estado.attrs.cargo_id.history.has_changes() or estado.attrs.area_id.history.has_changes():
+            session.info.setdefault('lotacao_alterada', {})[funcionario.id] = (
+                funcionario.cargo_id, funcionario.area_id
+            )
+
+
+@event.listens_for(Session, 'after_flush')
+def _atualizar_lotacao_resumos(session, flush_context):
+    alterados = session.info.pop('lotacao_alterada', None)
+    if not alterados:
+        return
+    # Um recálculo concorrente que leu o cargo antigo termina antes (ou espera)
+    travar_funcionarios(alterados)
+    parametros = [
+        {'b_funcionario_id': funcionario_id, 'b_cargo_id': cargo_id, 'b_area_id': area_id}
+        for funcionario_id, (cargo_id, area_id) in alterados.items()
+    ]
+    for tabela in (ResumoDiario.__table__, ResumoMensal.__table__, ResumoAnual.__table__):
+        session.execute(
+            tabela.update().where(
+                tabela.c.funcionario_id == db.bindparam('b_funcionario_id')
+            ).values(cargo_id=db.bindparam('b_cargo_id'), area_id=db.bindparam('b_area_id')),
+            parametros
+        )
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_dias_alterados(session):
+    session.info.pop('resumos_pendentes', None)
+    session.info.pop('lotacao_alterada', None)
+    session.info.pop('cache_invalidar', None)
+
+
+# Indicadores do dashboard em cache: cada gravação agenda a invalidação das
+# chaves que afeta, aplicada só quando a transação é confirmada
+CHAVES_CACHE_POR_MODELO = {
+    'Funcionario': 'total_funcionarios',
+    'AreaAtuacao': 'total_areas',
+    'Cargo': 'total_cargos',
+}
+
+
+class GeracaoCache(db.Model):
+    """
+    Geração de cada chave do cache de indicadores, incrementada logo depois do
+    commit que a invalida. O cache local é um por processo: é por aqui que os
+    outros workers do gunicorn e o worker_resumos.py ficam sabendo que o valor
+    guardado mudou.
+    """
+    __tablename__ = 'geracoes_cache'
+    
+    chave = db.Column(db.String(100), primary_key=True)
+    geracao = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def atuais(cls, conexao):
+        """Todas as gerações em uma consulta: {chave: geracao}"""
+        return dict(conexao.execute(db.select(cls.chave, cls.geracao)).all())
+    
+    @classmethod
+    def incrementar(cls, chaves, conexao):
+        """Incrementa as gerações das chaves na conexão dada (criando as que faltam)"""
+        tabela = cls.__table__
+        # Ordem fixa: duas transações com as mesmas chaves não se travam mutuamente
+        chaves = sorted(chaves)
+        insert = insert_com_conflito()
+        if insert is not None:
+            conexao.execute(
+                insert(tabela).values([{'chave': chave, 'geracao': 1} for chave in chaves])
+                .on_conflict_do_update(index_elements=['chave'], set_={'geracao': tabela.c.geracao + 1})
+            )
+            return
+        for chave in chaves:
+            resultado = conexao.execute(
+                tabela.update().where(tabela.c.chave == chave).values(geracao=tabela.c.geracao + 1)
+            )
+            if resultado.rowcount == 0:
+                conexao.execute(tabela.insert().values(chave=chave, geracao=1))
+    
+    def __repr__(self):
+        return f'<GeracaoCache {self.chave} - {self.geracao}>'
+
+
+def invalidar_no_commit(*chaves):
+    """Agenda a invalidação das chaves de cache para o commit da transação atual"""
+    db.session.info.setdefault('cache_invalidar', set()).update(chaves)
+
+
+@event.listens_for(Session, 'before_flush')
+def _coletar_cache_alterado(session, flush_context, instances):
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        chave = CHAVES_CACHE_POR_MODELO.get(type(objeto).__name__)
+        if chave:
+            session.info.setdefault('cache_invalidar', set()).add(chave)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_cache(session):
+    chaves = session.info.pop('cache_invalidar', None)
+    if chaves:
+        invalidar(*chaves)
+        session.info['cache_geracoes'] = chaves
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _incrementar_geracoes_cache(session, transaction):
+    # O Redis é compartilhado e basta apagar as chaves; o cache local de cada
+    # processo confere a geração no banco. Ela é incrementada em uma transação
+    # curta própria, depois que a conexão do commit voltou ao pool: quem grava
+    # horas não fica esperando pela mesma linha de geracoes_cache, e uma falha
+    # aqui só atrasa a invalidação nos outros processos (até o TTL)
+    if transaction.parent is not None:
+        return
+    chaves = session.info.pop('cache_geracoes', None)
+    if not chaves or not has_app_context() or not usa_geracoes(obter_cache()):
+        return
+    try:
+        with db.engine.begin() as conexao:
+            GeracaoCache.incrementar(chaves, conexao)
+    except Exception as e:
+        logger.warning(f"Erro ao incrementar as gerações do cache ({', '.join(sorted(chaves))}): {e}")
+
+
+def configurar_conexoes(engine, config):
+    """
+    Ajusta cada conexão nova do pool conforme o banco, uma única vez por conexão
+    
+    SQLite: WAL (leitores não bloqueiam o escritor), synchronous=NORMAL,
+    cache de páginas, mmap e espera por lock em vez de erro imediato.
+    PostgreSQL: tempo máximo por instrução e memória de ordenação/hash.
+    """
+    if engine.dialect.name == 'sqlite':
+        comandos = [
+            "PRAGMA journal_mode = WAL",
+            "PRAGMA synchronous = NORMAL",
+            "PRAGMA cache_size = -64000",  # 64 MB (valores negativos são KiB)
+            "PRAGMA mmap_size = 268435456",  # 256 MB
+            f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT', 5000))}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+    elif engine.dialect.name == 'postgresql':
+        comandos = [
+            f"SET statement_timeout = {int(config.get('DATABASE_QUERY_TIMEOUT', 30)) * 1000}",
+            f"SET work_mem = '{config.get('DATABASE_WORK_MEM', '16MB')}'",
+        ]
+    else:
+        return
+    
+    @event.listens_for(engine, 'connect')
+    def _ajustar_conexao(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for comando in comandos:
+                cursor.execute(comando)
+        finally:
+            cursor.close()
+        if engine.dialect.name == 'postgresql':
+            # Confirmar os SETs: o pool desfaz transações abertas ao devolver a conexão
+            dbapi_connection.commit()
+
+
+@contextmanager
+def sem_limite_de_tempo():
+    """
+    Transações iniciadas dentro do bloco rodam sem o statement_timeout que
+    configurar_conexoes aplica a toda conexão do pool (pensado para requisições):
+    migrações, deduplicações e o preenchimento dos consolidados podem levar
+    minutos em bases reais. SET LOCAL vale só até o fim de cada transação.
+    """
+    engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        yield
+        return
+    
+    def _desligar_timeout(conexao):
+        conexao.exec_driver_sql('SET LOCAL statement_timeout = 0')
+    
+    event.listen(engine, 'begin', _desligar_timeout)
+    try:
+        yield
+    finally:
+        event.remove(engine, 'begin', _desligar_timeout)
+
+
+def criar_estrutura():
+    """Cria as tabelas que faltam e aplica as migrações (passo de deploy, ver init_db.py)"""
+    with sem_limite_de_tempo():
+        db.create_all()
+        aplicar_migracoes()
+
+
+def aplicar_migracoes():
+    """Aplica ajustes de schema que o db.create_all() não faz em tabelas existentes"""
+    # Antes de qualquer consulta ORM a essas tabelas
+    for tabela in ('areas_atuacao', 'cargos', 'funcionarios'):
+        _garantir_coluna(tabela, 'atualizado_em', 'TIMESTAMP')
+    
+    _garantir_indice_unico('resumos_diarios', ('funcionario_id', 'data'), 'unique_funcionario_data')
+    
+    # Um registro por funcionário por dia: duplicatas são somadas no registro mais
+    # recente (nenhuma hora se perde) e os dias afetados são recalculados
+    duplicados = _garantir_indice_unico(
+        'registros_horas', ('funcionario_id', 'data'), 'unique_registro_funcionario_data',
+        mesclar=_mesclar_registros_horas
+    )
+    if duplicados:
+        ResumoDiario.atualizar_resumos(duplicados)
+        db.session.commit()
+    _remover_indice('idx_funcionario_data')  # coberto pelo índice único
+    
+    _garantir_indice('registros_horas', ('data', 'id'), 'idx_registros_data_id')
+    _garantir_indice('funcionarios', ('ativo', 'nome'), 'idx_funcionarios_ativo_nome')
+    operadores = ' text_pattern_ops' if db.engine.dialect.name == 'postgresql' else ''
+    _garantir_indice('funcionarios', ('ativo', f'lower(nome){operadores}'), 'idx_funcionarios_ativo_nome_minusculo')
+    _popular_consolidados()
+
+
+def _garantir_indice_unico(tabela, colunas, nome, mesclar=None):
+    """
+    Cria o índice único se a tabela ainda não tiver um equivalente
+    
+    As linhas duplicadas são entregues a `mesclar(conn, tabela, chaves)`, que
+    deve deixar uma linha por chave. Sem `mesclar` (tabelas derivadas, que são
+    recalculadas), fica a linha de maior id e cada linha removida vai para o
+    log em WARNING.
+    
+    Returns:
+        list: Chaves que tinham linhas duplicadas (vazia se nada mudou)
+    """
+    inspector = db.inspect(db.engine)
+    if not inspector.has_table(tabela):
+        return []
+    
+    unicos = [tuple(uc['column_names']) for uc in inspector.get_unique_constraints(tabela)]
+    unicos += [tuple(ix['column_names']) for ix in inspector.get_indexes(tabela) if ix.get('unique')]
+    if tuple(colunas) in unicos:
+        return []
+    
+    colunas_sql = ', '.join(colunas)
+    tabela_sql = db.metadata.tables[tabela]
+    with db.engine.begin() as conn:
+        duplicadas = conn.execute(
+            db.select(*[tabela_sql.c[coluna] for coluna in colunas])
+            .group_by(*[tabela_sql.c[coluna] for coluna in colunas])
+            .having(db.func.count() > 1)
+        ).all()
+        
+        if duplicadas and mesclar:
+            mesclar(conn, tabela_sql, duplicadas)
+        
+        # Manter apenas a linha mais recente de cada chave antes de criar o índice
+        manter = db.select(db.func.max(tabela_sql.c.id)).group_by(
+            *[tabela_sql.c[coluna] for coluna in colunas]
+        )
+        removidas = conn.execute(
+            db.select(tabela_sql).where(tabela_sql.c.id.not_in(manter))
+        ).mappings().all()
+        for linha in removidas:
+            logger.warning(f"Migração {nome}: linha duplicada removida de {tabela}: {dict(linha)}")
+        if removidas:
+            conn.execute(tabela_sql.delete().where(tabela_sql.c.id.not_in(manter)))
+        conn.execute(db.text(f"CREATE UNIQUE INDEX IF NOT EXISTS {nome} ON {tabela} ({colunas_sql})"))
+    
+    return [tuple(chave) for chave in duplicadas]
+
+
+def _mesclar_registros_horas(conn, tabela, chaves):
+    """
+    Junta os registros de horas duplicados de cada (funcionario_id, data) no de
+    maior id: as horas são somadas e as observações concatenadas. Cada registro
+    absorvido é registrado no log em WARNING com id, funcionário, data e horas.
+    """
+    for funcionario_id, data in chaves:
+        linhas = conn.execute(
+            db.select(tabela.c.id, tabela.c.horas, tabela.c.observacoes).where(
+                tabela.c.funcionario_id == funcionario_id,
+                tabela.c.data == data
+            ).order_by(tabela.c.id)
+        ).all()
+        mantido, absorvidos = linhas[-1], linhas[:-1]
+        
+        for linha in absorvidos:
+            logger.warning(
+                f"Migração: registro {linha.id} (funcionário {funcionario_id}, {data}, "
+                f"{linha.horas}h) somado ao registro {mantido.id}"
+            )
+        
+        observacoes = ' | '.join(linha.observacoes for linha in linhas if linha.observacoes)
+        conn.execute(
+            tabela.update().where(tabela.c.id == mantido.id).values(
+                horas=sum(linha.horas or 0 for linha in linhas),
+                observacoes=observacoes or None
+            )
+        )
+        conn.execute(tabela.delete().where(tabela.c.id.in_([linha.id for linha in absorvidos])))
+
+
+def _garantir_indice(tabela, colunas, nome):
+    """Cria o índice em tabelas existentes (o db.create_all() só cria em tabelas novas)"""
+    if not db.inspect(db.engine).has_table(tabela):
+        return
+    
+    with db.engine.begin() as conn:
+        conn.execute(db.text(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} ({', '.join(colunas)})"))
+
+
+def _garantir_coluna(tabela, coluna, tipo):
+    """Adiciona a coluna (anulável) em tabelas existentes que ainda não a têm"""
+    inspector = db.inspect(db.engine)
+    if not inspector.has_table(tabela):
+        return
+    if coluna in {c['name'] for c in inspector.get_columns(tabela)}:
+        return
+    
+    with db.engine.begin() as conn:
+        conn.execute(db.text(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}"))
+
+
+def _remover_indice(nome):
+    with db.engine.begin() as conn:
+        conn.execute(db.text(f"DROP INDEX IF EXISTS {nome}"))
+
+
+def _popular_consolidados():
+    """Gera os resumos de todo o histórico na primeira execução com os consolidados"""
+    if ResumoMensal.query.first() is not None:
+        return
+    
+    inicio, fim = db.session.query(db.func.min(RegistroHora.data), db.func.max(RegistroHora.data)).one()
+    if inicio is None:
+        return
+    
+    ResumoDiario.gerar_resumos_periodo(inicio, fim)
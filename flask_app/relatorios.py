@@ -0,0 +1,305 @@
+"""
+Camada de consultas de relatórios
+Agregações feitas no banco (SUM/COUNT/GROUP BY) com os nomes de cargo e área
+resolvidos na mesma instrução, para que a memória dependa do número de
+funcionários e não do número de registros.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from flask_app.models import db, Funcionario, Cargo, AreaAtuacao, RegistroHora, ResumoMensal
+
+
+def _colunas_funcionario():
+    """Colunas de identificação do funcionário usadas nas planilhas"""
+    return (
+        Funcionario.id.label('funcionario_id'),
+        Funcionario.nome.label('nome'),
+        db.func.coalesce(Cargo.nome, 'N/A').label('cargo'),
+        db.func.coalesce(AreaAtuacao.nome, 'N/A').label('area'),
+    )
+
+
+def _com_cargo_area(query):
+    # A área exibida é a do cargo, como nas planilhas originais
+    return query.outerjoin(
+        Cargo, Cargo.id == Funcionario.cargo_id
+    ).outerjoin(
+        AreaAtuacao, AreaAtuacao.id == Cargo.area_id
+    )
+
+
+def _aplicar_filtros(query, modelo, funcionario_id=None, cargo_id=None, area_id=None,
+                     data_inicio=None, data_fim=None):
+    """
+    Filtros comuns a RegistroHora e ResumoDiario. Cargo e área são os do
+    funcionário, que a query já deve ter juntado quando esses filtros forem usados.
+    """
+    if funcionario_id:
+        query = query.filter(modelo.funcionario_id == funcionario_id)
+    if cargo_id:
+        query = query.filter(Funcionario.cargo_id == cargo_id)
+    if area_id:
+        query = query.filter(Funcionario.area_id == area_id)
+    if data_inicio:
+        query = query.filter(modelo.data >= data_inicio)
+    if data_fim:
+        query = query.filter(modelo.data <= data_fim)
+    return query
+
+
+def filtrar_registros(modelo=RegistroHora, funcionario_id=None, cargo_id=None, area_id=None,
+                      data_inicio=None, data_fim=None, carregar_funcionario=False):
+    """
+    Query de RegistroHora (ou ResumoDiario) com os filtros da página de
+    relatórios, juntando cada tabela relacionada no máximo uma vez
+
+    Args:
+        carregar_funcionario: Preenche funcionario, cargo e área pelos mesmos
+            joins usados no filtro (contains_eager), sem consultas extras
+
+    Returns:
+        Query: Instâncias de `modelo`, sem ordenação
+    """
+    query = modelo.query
+
+    if carregar_funcionario:
+        query = query.join(modelo.funcionario).outerjoin(
+            Funcionario.cargo
+        ).outerjoin(
+            Funcionario.area
+        ).options(
+            db.contains_eager(modelo.funcionario).contains_eager(Funcionario.cargo),
+            db.contains_eager(modelo.funcionario).contains_eager(Funcionario.area)
+        )
+    elif cargo_id or area_id:
+        query = query.join(modelo.funcionario)
+
+    return _aplicar_filtros(query, modelo, funcionario_id, cargo_id, area_id, data_inicio, data_fim)
+
+
+def horas_por_funcionario_no_mes(ano, mes, funcionario_id=None):
+    """
+    Total de horas e registros por funcionário em um mês
+
+    Returns:
+        list: Linhas com funcionario_id, nome, cargo, area, total_horas, total_registros
+    """
+    query = db.session.query(
+        *_colunas_funcionario(),
+        db.func.sum(ResumoMensal.total_horas).label('total_horas'),
+        db.func.sum(ResumoMensal.total_registros).label('total_registros')
+    ).select_from(ResumoMensal).join(
+        Funcionario, Funcionario.id == ResumoMensal.funcionario_id
+    )
+    query = _com_cargo_area(query).filter(
+        ResumoMensal.ano == ano,
+        ResumoMensal.mes == mes
+    )
+
+    if funcionario_id:
+        query = query.filter(ResumoMensal.funcionario_id == funcionario_id)
+
+    return query.group_by(
+        Funcionario.id, Funcionario.nome, Cargo.nome, AreaAtuacao.nome
+    ).all()
+
+
+def horas_por_funcionario_e_mes(ano, funcionario_id=None):
+    """
+    Total de horas e registros por funcionário e mês em um ano
+
+    Returns:
+        list: Linhas com funcionario_id, nome, cargo, area, mes, total_horas, total_registros
+    """
+    query = db.session.query(
+        *_colunas_funcionario(),
+        ResumoMensal.mes.label('mes'),
+        db.func.sum(ResumoMensal.total_horas).label('total_horas'),
+        db.func.sum(ResumoMensal.total_registros).label('total_registros')
+    ).select_from(ResumoMensal).join(
+        Funcionario, Funcionario.id == ResumoMensal.funcionario_id
+    )
+    query = _com_cargo_area(query).filter(ResumoMensal.ano == ano)
+
+    if funcionario_id:
+        query = query.filter(ResumoMensal.funcionario_id == funcionario_id)
+
+    return query.group_by(
+        Funcionario.id, Funcionario.nome, Cargo.nome, AreaAtuacao.nome, ResumoMensal.mes
+    ).all()
+
+
+def horas_mes_por_funcionario(ano, mes, funcionario_ids=None):
+    """
+    Horas de cada funcionário no mês, lidas do consolidado mensal
+
+    Returns:
+        dict: {funcionario_id: total_horas}; funcionários sem registros ficam de fora
+    """
+    query = db.session.query(
+        ResumoMensal.funcionario_id,
+        ResumoMensal.total_horas
+    ).filter(
+        ResumoMensal.ano == ano,
+        ResumoMensal.mes == mes
+    )
+
+    if funcionario_ids is not None:
+        query = query.filter(ResumoMensal.funcionario_id.in_(funcionario_ids))
+
+    return {funcionario_id: total_horas for funcionario_id, total_horas in query}
+
+
+def registros_com_cargo_area(data_inicio, data_fim, funcionario_id=None):
+    """
+    Registros de horas do período com nome, cargo e área resolvidos na mesma
+    consulta, já ordenados por área, cargo, funcionário e data
+
+    Returns:
+        Query: Linhas com area, cargo, nome, data, horas
+    """
+    colunas = _colunas_funcionario()
+    query = db.session.query(
+        *colunas[1:],
+        RegistroHora.data.label('data'),
+        RegistroHora.horas.label('horas')
+    ).select_from(RegistroHora).join(
+        Funcionario, Funcionario.id == RegistroHora.funcionario_id
+    )
+    query = _aplicar_filtros(
+        _com_cargo_area(query), RegistroHora,
+        funcionario_id=funcionario_id, data_inicio=data_inicio, data_fim=data_fim
+    )
+
+    area, cargo, nome = colunas[3], colunas[2], colunas[1]
+    return query.order_by(area, cargo, nome, RegistroHora.data, RegistroHora.id)
+
+
+def registros_para_exportacao(funcionario_id=None, cargo_id=None, area_id=None,
+                              data_inicio=None, data_fim=None):
+    """
+    Registros de horas com os mesmos filtros da página de relatórios, em
+    colunas simples e ordenados por data, para exportação em streaming
+
+    Returns:
+        Query: Linhas com id, data, funcionario_id, funcionario, cargo, area, horas, observacoes
+    """
+    query = db.session.query(
+        RegistroHora.id.label('id'),
+        RegistroHora.data.label('data'),
+        RegistroHora.funcionario_id.label('funcionario_id'),
+        Funcionario.nome.label('funcionario'),
+        Cargo.nome.label('cargo'),
+        AreaAtuacao.nome.label('area'),
+        RegistroHora.horas.label('horas'),
+        RegistroHora.observacoes.label('observacoes')
+    ).select_from(RegistroHora).join(
+        Funcionario, Funcionario.id == RegistroHora.funcionario_id
+    )
+    query = _aplicar_filtros(
+        _com_cargo_area(query), RegistroHora,
+        funcionario_id, cargo_id, area_id, data_inicio, data_fim
+    )
+
+    return query.order_by(RegistroHora.data, RegistroHora.id)
+
+
+def _cursor_do_registro(registro):
+    return f'{registro.data.isoformat()}_{registro.id}'
+
+
+def _ler_cursor(cursor):
+    """Converte 'AAAA-MM-DD_id' em (data, id). Cursores inválidos são ignorados."""
+    try:
+        data, registro_id = cursor.split('_')
+        return datetime.strptime(data, '%Y-%m-%d').date(), int(registro_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def paginar_registros(query, por_pagina, depois=None, antes=None):
+    """
+    Paginação por cursor (keyset) de uma query de RegistroHora, do mais recente
+    para o mais antigo. A página é buscada pela posição (data, id) do cursor,
+    com custo constante em qualquer profundidade (índice idx_registros_data_id).
+
+    Args:
+        depois: Cursor do último registro da página atual (próxima página)
+        antes: Cursor do primeiro registro da página atual (página anterior)
+
+    Returns:
+        tuple: (registros, cursor_anterior, cursor_proximo), cursores None quando não há página
+    """
+    chave = tuple_(RegistroHora.data, RegistroHora.id)
+    antes, depois = _ler_cursor(antes), _ler_cursor(depois)
+
+    if antes:
+        # Página anterior: percorre em ordem crescente a partir do cursor e inverte
+        pagina = query.filter(chave > antes).order_by(
+            RegistroHora.data.asc(), RegistroHora.id.asc()
+        ).limit(por_pagina + 1).all()
+        if not pagina:
+            return paginar_registros(query, por_pagina)
+
+        ha_mais = len(pagina) > por_pagina
+        registros = list(reversed(pagina[:por_pagina]))
+        return (
+            registros,
+            _cursor_do_registro(registros[0]) if ha_mais else None,
+            _cursor_do_registro(registros[-1])
+        )
+
+    if depois:
+        query = query.filter(chave < depois)
+
+    pagina = query.order_by(
+        RegistroHora.data.desc(), RegistroHora.id.desc()
+    ).limit(por_pagina + 1).all()
+
+    ha_mais = len(pagina) > por_pagina
+    registros = pagina[:por_pagina]
+    return (
+        registros,
+        _cursor_do_registro(registros[0]) if depois and registros else None,
+        _cursor_do_registro(registros[-1]) if ha_mais else None
+    )
+
+
+def estatisticas_registros(query):
+    """
+    Totais de uma query filtrada de RegistroHora, calculados no banco sobre
+    todo o conjunto filtrado (e não só sobre a página exibida)
+
+    Returns:
+        tuple: (estatisticas, dados_grafico) com total_horas, total_registros,
+        total_funcionarios, media_horas_funcionario e a série de horas por dia
+    """
+    query = query.order_by(None)
+
+    total_horas, total_registros, total_funcionarios = query.with_entities(
+        db.func.coalesce(db.func.sum(RegistroHora.horas), 0),
+        db.func.count(RegistroHora.id),
+        db.func.count(db.distinct(RegistroHora.funcionario_id))
+    ).one()
+
+    estatisticas = {
+        'total_horas': float(total_horas),
+        'total_registros': total_registros,
+        'total_funcionarios': total_funcionarios,
+        'media_horas_funcionario': float(total_horas) / total_funcionarios if total_funcionarios else 0
+    }
+
+    por_dia = query.with_entities(
+        RegistroHora.data,
+        db.func.sum(RegistroHora.horas)
+    ).group_by(RegistroHora.data).order_by(RegistroHora.data).all()
+
+    dados_grafico = {
+        'labels': [data.strftime('%d/%m/%Y') for data, _ in por_dia],
+        'valores': [float(horas) for _, horas in por_dia]
+    } if por_dia else None
+
+    return estatisticas, dados_grafico
@@ -1,13 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context, current_app
 from datetime import datetime, date, timedelta
 from flask_app.models import db, Funcionario, Cargo, AreaAtuacao, RegistroHora, ResumoDiario
-from flask_app.utils import gerar_relatorio_excel
+from flask_app.relatorios import (
+    registros_para_exportacao, paginar_registros, estatisticas_registros, filtrar_registros,
+    horas_mes_por_funcionario
+)
+from flask_app import cache, exportacoes
+from flask_app.importacao import importar_registros, importar_arquivo
 from flask_app.auth import login_required
+import csv
+import io
 import json
 import logging
 import os
 from functools import wraps
-from sqlalchemy import text
 
 # Criar blueprint principal
 main_bp = Blueprint('main', __name__)
@@ -35,17 +41,8 @@ def init_routes(app):
     """Registrar blueprints na aplicação"""
     
     # Registrar blueprint principal
+    # (ajustes de conexão ficam em models.configurar_conexoes, uma vez por conexão do pool)
     app.register_blueprint(main_bp)
-    
-    # Configurar otimizações do SQLAlchemy
-    @app.before_request
-    def optimize_db():
-        """Otimizações de performance do banco"""
-        if request.endpoint and 'main.' in request.endpoint:
-            # Habilitar cache de queries para rotas pesadas
-            with db.engine.connect() as conn:
-                conn.execute(text("PRAGMA cache_size = 10000"))
-                conn.execute(text("PRAGMA temp_store = MEMORY"))
 
 @main_bp.route('/dashboard')
 @handle_errors
@@ -55,18 +52,33 @@ def dashboard():
     hoje = date.today()
     primeiro_dia_mes = hoje.replace(day=1)
     
-    # Queries otimizadas
-    total_funcionarios = Funcionario.query.filter_by(ativo=True).count()
-    total_areas = AreaAtuacao.query.filter_by(ativo=True).count()
-    total_cargos = Cargo.query.filter_by(ativo=True).count()
+    # Indicadores em cache, invalidados no commit das gravações que os afetam
+    total_funcionarios = cache.memorizar(
+        'total_funcionarios', lambda: Funcionario.query.filter_by(ativo=True).count()
+    )
+    total_areas = cache.memorizar(
+        'total_areas', lambda: AreaAtuacao.query.filter_by(ativo=True).count()
+    )
+    total_cargos = cache.memorizar(
+        'total_cargos', lambda: Cargo.query.filter_by(ativo=True).count()
+    )
     
-    # Horas do mês
-    horas_mes = db.session.query(
-        db.func.coalesce(db.func.sum(RegistroHora.horas), 0)
-    ).filter(
-        RegistroHora.data >= primeiro_dia_mes,
-        RegistroHora.data <= hoje
-    ).scalar() or 0
+    # Horas do mês até hoje (lançamentos futuros não entram), lidas dos resumos
+    # diários. O valor vale até a meia-noite, quando o corte avança um dia.
+    meia_noite = datetime.combine(hoje + timedelta(days=1), datetime.min.time())
+    horas_mes = cache.memorizar(
+        cache.chave_horas_mes(hoje.year, hoje.month),
+        lambda: float(db.session.query(
+            db.func.coalesce(db.func.sum(ResumoDiario.total_horas), 0)
+        ).filter(
+            ResumoDiario.data >= primeiro_dia_mes,
+            ResumoDiario.data <= hoje
+        ).scalar() or 0),
+        ttl=min(
+            current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300),
+            max(1, int((meia_noite - datetime.now()).total_seconds()))
+        )
+    )
     
     # Últimos 5 registros para atividade recente
     ultimos_registros = RegistroHora.query.options(
@@ -83,32 +95,89 @@ def dashboard():
                          total_horas_mes=int(horas_mes),
                          ultimos_registros=ultimos_registros)
 
+def _pagina_funcionarios(args):
+    """Página de funcionários ativos com busca, filtros e horas do mês atual"""
+    filtros = {
+        'q': args.get('q', '').strip(),
+        'cargo_id': args.get('cargo_id', type=int),
+        'area_id': args.get('area_id', type=int)
+    }
+    
+    query = Funcionario.buscar_ativos(filtros['q'], filtros['cargo_id'], filtros['area_id'])
+    funcionarios, proximo = Funcionario.paginar_por_nome(
+        query.options(
+            db.joinedload(Funcionario.cargo),
+            db.joinedload(Funcionario.area)
+        ),
+        current_app.config.get('RECORDS_PER_PAGE', 20),
+        depois=args.get('depois', type=int)
+    )
+    
+    # Horas do mês atual só dos funcionários da página, do consolidado mensal
+    hoje = date.today()
+    horas_mes = horas_mes_por_funcionario(hoje.year, hoje.month, [f.id for f in funcionarios])
+    
+    return funcionarios, proximo, horas_mes, filtros
+
+def _url_proxima_pagina_funcionarios(filtros, proximo):
+    """
+    URL da próxima página com os filtros que geraram a lista exibida (e não os
+    campos do formulário, que podem ter sido editados depois)
+    """
+    if not proximo:
+        return None
+    aplicados = {chave: valor for chave, valor in filtros.items() if valor}
+    return url_for('main.api_listar_funcionarios', depois=proximo, **aplicados)
+
 @main_bp.route('/funcionarios')
 @handle_errors
 @login_required
 def listar_funcionarios():
-    """Listar funcionários com dados completos"""
-    from datetime import datetime
-    
-    # Buscar funcionários com joins otimizados
-    funcionarios = Funcionario.query.options(
-        db.joinedload(Funcionario.cargo),
-        db.joinedload(Funcionario.area),
-        db.joinedload(Funcionario.registros_horas)
-    ).filter_by(ativo=True).order_by(Funcionario.nome).all()
+    """Listar funcionários com busca e paginação"""
+    funcionarios, proximo, horas_mes, filtros = _pagina_funcionarios(request.args)
+    total_funcionarios = Funcionario.query.filter_by(ativo=True).count()
     
-    # Buscar cargos e áreas para os modals
+    # Buscar cargos e áreas para os filtros e modals
     cargos = Cargo.query.filter_by(ativo=True).order_by(Cargo.nome).all()
     areas = AreaAtuacao.query.filter_by(ativo=True).order_by(AreaAtuacao.nome).all()
     
-    # Primeiro dia do mês atual para cálculo de horas
-    primeiro_dia_mes = datetime.now().replace(day=1).date()
-    
     return render_template('funcionarios/listar_clean.html', 
                          funcionarios=funcionarios,
+                         total_funcionarios=total_funcionarios,
+                         proximo=proximo,
+                         url_proximo=_url_proxima_pagina_funcionarios(filtros, proximo),
+                         filtros=filtros,
                          cargos=cargos,
                          areas=areas,
-                         primeiro_dia_mes=primeiro_dia_mes)
+                         horas_mes=horas_mes)
+
+@main_bp.route('/api/funcionarios')
+@handle_errors
+@login_required
+def api_listar_funcionarios():
+    """Próxima página de funcionários para carregamento incremental"""
+    funcionarios, proximo, horas_mes, filtros = _pagina_funcionarios(request.args)
+    
+    html = ''.join(
+        render_template('funcionarios/_linha.html', funcionario=funcionario, horas_mes=horas_mes)
+        for funcionario in funcionarios
+    )
+    
+    return jsonify({
+        'success': True,
+        'funcionarios': [{
+            'id': f.id,
+            'nome': f.nome,
+            'cargo_id': f.cargo_id,
+            'cargo': f.cargo.nome if f.cargo else None,
+            'area_id': f.area_id,
+            'area': f.area.nome if f.area else None,
+            'horas_mes': horas_mes.get(f.id, 0)
+        } for f in funcionarios],
+        'html': html,
+        'proximo': proximo,
+        'url_proximo': _url_proxima_pagina_funcionarios(filtros, proximo)
+    })
 
 @main_bp.route('/funcionarios/novo', methods=['GET', 'POST'])
 @handle_errors
@@ -499,30 +568,14 @@ def processar_registro_horas():
             flash('Funcionário não encontrado ou inativo.', 'error')
             return redirect(url_for('main.registrar_horas'))
         
-        # Verificar se já existe registro para este funcionário na data
-        registro_existente = RegistroHora.query.filter_by(
-            funcionario_id=funcionario_id,
-            data=data_registro
-        ).first()
+        # Criar ou atualizar o registro do dia em uma única instrução (upsert)
+        criado = RegistroHora.registrar(funcionario_id, data_registro, horas_decimal, observacoes)
+        db.session.commit()
         
-        if registro_existente:
-            # Atualizar registro existente
-            registro_existente.horas = horas_decimal
-            registro_existente.observacoes = observacoes
-            registro_existente.updated_at = datetime.utcnow()
-            flash('Registro de horas atualizado com sucesso!', 'success')
-        else:
-            # Criar novo registro
-            registro = RegistroHora(
-                funcionario_id=funcionario_id,
-                data=data_registro,
-                horas=horas_decimal,
-                observacoes=observacoes
-            )
-            db.session.add(registro)
+        if criado:
             flash('Horas registradas com sucesso!', 'success')
-        
-        db.session.commit()
+        else:
+            flash('Registro de horas atualizado com sucesso!', 'success')
         
     except ValueError as e:
         db.session.rollback()
@@ -535,6 +588,60 @@ def processar_registro_horas():
     
     return redirect(url_for('main.registrar_horas'))
 
+@main_bp.route('/horas/importar', methods=['POST'])
+@handle_errors
+@login_required
+def importar_planilha_horas():
+    """Importar registros de horas de uma planilha CSV ou XLSX"""
+    arquivo = request.files.get('arquivo')
+    formato = os.path.splitext(arquivo.filename)[1].lower().lstrip('.') if arquivo and arquivo.filename else ''
+    quer_json = request.accept_mimetypes.best == 'application/json'
+    
+    if formato not in ('csv', 'xlsx'):
+        mensagem = 'Envie uma planilha .csv ou .xlsx.'
+        if quer_json:
+            return jsonify({'success': False, 'message': mensagem}), 400
+        flash(mensagem, 'error')
+        return redirect(url_for('main.registrar_horas'))
+    
+    try:
+        relatorio = importar_arquivo(arquivo.stream, formato)
+    except ValueError as e:
+        if quer_json:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        flash(f'Planilha inválida: {e}', 'error')
+        return redirect(url_for('main.registrar_horas'))
+    
+    logger.info(
+        f"Importação de {arquivo.filename}: {relatorio['linhas']} linhas em {relatorio['segundos']}s "
+        f"({relatorio['linhas_por_segundo']} linhas/s), {relatorio['rejeitados']} rejeitadas"
+    )
+    
+    if quer_json:
+        return jsonify({'success': True, **relatorio})
+    
+    flash(
+        f"Importação concluída: {relatorio['criados']} criados, {relatorio['atualizados']} atualizados, "
+        f"{relatorio['rejeitados']} rejeitados em {relatorio['segundos']}s.",
+        'success' if not relatorio['rejeitados'] else 'warning'
+    )
+    for rejeicao in relatorio['rejeicoes'][:5]:
+        flash(f"Linha {rejeicao['linha']}: {rejeicao['erro']}", 'warning')
+    return redirect(url_for('main.registrar_horas'))
+
+def _filtros_registros(args):
+    """Filtros da página de relatórios, com as datas já convertidas"""
+    data_inicio = args.get('data_inicio')
+    data_fim = args.get('data_fim')
+    
+    return {
+        'funcionario_id': args.get('funcionario_id', type=int),
+        'cargo_id': args.get('cargo_id', type=int),
+        'area_id': args.get('area_id', type=int),
+        'data_inicio': datetime.strptime(data_inicio, '%Y-%m-%d').date() if data_inicio else None,
+        'data_fim': datetime.strptime(data_fim, '%Y-%m-%d').date() if data_fim else None
+    }
+
 @main_bp.route('/relatorios')
 @handle_errors
 @login_required
@@ -548,32 +655,22 @@ def relatorios():
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
         
-        # Construir query base otimizada
-        query = RegistroHora.query.options(
-            db.joinedload(RegistroHora.funcionario).joinedload(Funcionario.cargo),
-            db.joinedload(RegistroHora.funcionario).joinedload(Funcionario.area)
-        )
+        filtros = _filtros_registros(request.args)
+        
+        # Totais e série por dia sobre todo o conjunto filtrado
+        estatisticas, dados_grafico = estatisticas_registros(filtrar_registros(**filtros))
         
-        # Aplicar filtros
-        if funcionario_id:
-            query = query.filter(RegistroHora.funcionario_id == funcionario_id)
-        if cargo_id:
-            query = query.join(Funcionario).filter(Funcionario.cargo_id == cargo_id)
-        if area_id:
-            query = query.join(Funcionario).filter(Funcionario.area_id == area_id)
-        if data_inicio:
-            data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-            query = query.filter(RegistroHora.data >= data_inicio_obj)
-        if data_fim:
-            data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-            query = query.filter(RegistroHora.data <= data_fim_obj)
-        
-        # Executar query com ordenação e limitação
-        registros = query.order_by(RegistroHora.data.desc()).limit(1000).all()
-        
-        # Calcular totais
-        total_horas = sum(r.horas for r in registros)
-        total_registros = len(registros)
+        # Página atual por cursor (data, id): custo constante em qualquer profundidade
+        registros, cursor_anterior, cursor_proximo = paginar_registros(
+            filtrar_registros(carregar_funcionario=True, **filtros),
+            current_app.config.get('RECORDS_PER_PAGE', 20),
+            depois=request.args.get('depois'),
+            antes=request.args.get('antes')
+        )
+        filtros_paginacao = {
+            chave: valor for chave, valor in request.args.items()
+            if valor and chave not in ('depois', 'antes')
+        }
         
         # Carregar dados para filtros
         funcionarios = Funcionario.query.filter_by(ativo=True).order_by(Funcionario.nome).all()
@@ -585,62 +682,72 @@ def relatorios():
                              funcionarios=funcionarios,
                              cargos=cargos,
                              areas=areas,
-                             total_horas=total_horas,
-                             total_registros=total_registros,
+                             total_horas=estatisticas['total_horas'],
+                             total_registros=estatisticas['total_registros'],
+                             estatisticas=estatisticas,
+                             dados_grafico=dados_grafico,
                              funcionario_selecionado=funcionario_id,
                              cargo_selecionado=cargo_id,
                              area_selecionada=area_id,
                              data_inicio=data_inicio,
-                             data_fim=data_fim)
+                             data_fim=data_fim,
+                             cursor_anterior=cursor_anterior,
+                             cursor_proximo=cursor_proximo,
+                             filtros_paginacao=filtros_paginacao)
     
     except Exception as e:
         logger.error(f"Erro ao gerar relatórios: {e}")
         flash('Erro ao carregar relatórios.', 'error')
         return redirect(url_for('main.dashboard'))
 
+def iterar_arquivo(arquivo, tamanho_bloco=64 * 1024):
+    """Lê o arquivo em blocos para uma resposta em streaming, fechando-o ao final"""
+    try:
+        while True:
+            bloco = arquivo.read(tamanho_bloco)
+            if not bloco:
+                break
+            yield bloco
+    finally:
+        arquivo.close()
+
+def _resposta_download(arquivo, nome_arquivo, mimetype):
+    """Envia o arquivo em blocos e garante que ele seja fechado (e removido) ao final"""
+    tamanho = arquivo.seek(0, os.SEEK_END)
+    arquivo.seek(0)
+    
+    response = Response(iterar_arquivo(arquivo), mimetype=mimetype, direct_passthrough=True)
+    response.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    response.content_length = tamanho
+    # Se o cliente desconectar antes do streaming começar, o gerador nunca roda
+    response.call_on_close(arquivo.close)
+    return response
+
 @main_bp.route('/relatorios/exportar-excel')
 @handle_errors
 @login_required
 def exportar_excel():
     """Exportar relatório para Excel"""
     try:
-        # Obter mesmo filtros da página de relatórios
-        funcionario_id = request.args.get('funcionario_id', type=int)
-        cargo_id = request.args.get('cargo_id', type=int)
-        area_id = request.args.get('area_id', type=int)
-        data_inicio = request.args.get('data_inicio')
-        data_fim = request.args.get('data_fim')
-        tipo = request.args.get('tipo', 'mensal')
-        
-        # Determinar período para Excel baseado nos filtros
-        mes = None
-        ano = None
+        tipo, funcionario_id, mes, ano = _parametros_excel(request.args)
         
-        if data_inicio:
-            data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-            mes = data_inicio_obj.month
-            ano = data_inicio_obj.year
-        else:
-            mes = datetime.now().month
-            ano = datetime.now().year
+        # Exportação idêntica já gerada em segundo plano: servir do cache
+        job_id = exportacoes.chave_exportacao(tipo, funcionario_id, mes, ano)
+        caminho = exportacoes.arquivo_pronto(job_id)
+        if caminho:
+            return _resposta_download(open(caminho, 'rb'), _nome_arquivo_excel(), MIMETYPE_EXCEL)
         
-        # Gerar arquivo Excel
-        arquivo_path = gerar_relatorio_excel(
+        # Gerar arquivo Excel em buffer temporário (memória ou disco, conforme o tamanho).
+        # O openpyxl só é carregado aqui, na primeira exportação do processo.
+        from flask_app.utils import gerar_relatorio_excel
+        arquivo = gerar_relatorio_excel(
             tipo=tipo,
             funcionario_id=funcionario_id,
             mes=mes,
             ano=ano
         )
         
-        if arquivo_path and os.path.exists(arquivo_path):
-            return send_file(
-                arquivo_path,
-                as_attachment=True,
-                download_name=f'relatorio_horas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx',
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:
-            flash('Erro ao gerar arquivo Excel.', 'error')
+        return _resposta_download(arquivo, _nome_arquivo_excel(), MIMETYPE_EXCEL)
             
     except Exception as e:
         logger.error(f"Erro ao exportar Excel: {e}")
@@ -648,7 +755,178 @@ def exportar_excel():
     
     return redirect(url_for('main.relatorios'))
 
+MIMETYPE_EXCEL = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def _nome_arquivo_excel():
+    return f'relatorio_horas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+
+def _parametros_excel(args):
+    """Tipo, funcionário e período do Excel a partir dos filtros da página de relatórios"""
+    filtros = _filtros_registros(args)
+    tipo = args.get('tipo', 'mensal')
+    
+    # Determinar período para Excel baseado nos filtros
+    referencia = filtros['data_inicio'] or datetime.now()
+    
+    return tipo, filtros['funcionario_id'], referencia.month, referencia.year
+
+def _resposta_status_exportacao(status):
+    if status['status'] == 'concluido':
+        status['url_download'] = url_for('main.baixar_exportacao', job_id=status['job_id'])
+    status['url_status'] = url_for('main.status_exportacao', job_id=status['job_id'])
+    return status
+
+@main_bp.route('/relatorios/exportacoes', methods=['POST'])
+@handle_errors
+@login_required
+def submeter_exportacao():
+    """Agendar exportação Excel em segundo plano"""
+    try:
+        tipo, funcionario_id, mes, ano = _parametros_excel(request.values)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Data inválida'}), 400
+    
+    status = exportacoes.submeter_exportacao(tipo, funcionario_id, mes, ano)
+    codigo = 200 if status['status'] == 'concluido' else 202
+    return jsonify(_resposta_status_exportacao(status)), codigo
+
+@main_bp.route('/relatorios/exportacoes/<job_id>')
+@handle_errors
+@login_required
+def status_exportacao(job_id):
+    """Consultar o andamento de uma exportação"""
+    status = exportacoes.status_exportacao(job_id) if exportacoes.job_id_valido(job_id) else None
+    if not status:
+        return jsonify({'success': False, 'message': 'Exportação não encontrada'}), 404
+    return jsonify(_resposta_status_exportacao(status))
+
+@main_bp.route('/relatorios/exportacoes/<job_id>/download')
+@handle_errors
+@login_required
+def baixar_exportacao(job_id):
+    """Baixar o arquivo de uma exportação concluída"""
+    caminho = exportacoes.arquivo_pronto(job_id) if exportacoes.job_id_valido(job_id) else None
+    if not caminho:
+        flash('Exportação não encontrada ou expirada.', 'error')
+        return redirect(url_for('main.relatorios'))
+    return _resposta_download(open(caminho, 'rb'), _nome_arquivo_excel(), MIMETYPE_EXCEL)
+
+# Linhas agrupadas por bloco enviado nas exportações em streaming
+LINHAS_POR_BLOCO_EXPORTACAO = 500
+
+CAMPOS_EXPORTACAO = ['id', 'data', 'funcionario_id', 'funcionario', 'cargo', 'area', 'horas', 'observacoes']
+
+def _query_exportacao():
+    """Query de exportação com os mesmos filtros da página de relatórios"""
+    return registros_para_exportacao(
+        **_filtros_registros(request.args)
+    ).yield_per(LINHAS_POR_BLOCO_EXPORTACAO)  # cursor no servidor, lido em lotes
+
+def _resposta_streaming(gerador, extensao, mimetype):
+    response = Response(stream_with_context(gerador), mimetype=mimetype)
+    nome_arquivo = f'registros_horas_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extensao}'
+    response.headers['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+@main_bp.route('/relatorios/exportar.csv')
+@handle_errors
+@login_required
+def exportar_csv():
+    """Exportar registros filtrados em CSV (streaming)"""
+    query = _query_exportacao()
+    
+    def gerar():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CAMPOS_EXPORTACAO)
+        
+        for i, registro in enumerate(query, 1):
+            writer.writerow([
+                registro.id,
+                registro.data.isoformat(),
+                registro.funcionario_id,
+                registro.funcionario,
+                registro.cargo or '',
+                registro.area or '',
+                round(registro.horas, 2),
+                registro.observacoes or ''
+            ])
+            if i % LINHAS_POR_BLOCO_EXPORTACAO == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        yield buffer.getvalue()
+    
+    return _resposta_streaming(gerar(), 'csv', 'text/csv')
+
+@main_bp.route('/relatorios/exportar.ndjson')
+@handle_errors
+@login_required
+def exportar_ndjson():
+    """Exportar registros filtrados em NDJSON - um objeto JSON por linha (streaming)"""
+    query = _query_exportacao()
+    
+    def gerar():
+        linhas = []
+        for registro in query:
+            linhas.append(json.dumps({
+                'id': registro.id,
+                'data': registro.data.isoformat(),
+                'funcionario_id': registro.funcionario_id,
+                'funcionario': registro.funcionario,
+                'cargo': registro.cargo,
+                'area': registro.area,
+                'horas': round(registro.horas, 2),
+                'observacoes': registro.observacoes
+            }, ensure_ascii=False) + '\n')
+            if len(linhas) >= LINHAS_POR_BLOCO_EXPORTACAO:
+                yield ''.join(linhas)
+                linhas = []
+        
+        if linhas:
+            yield ''.join(linhas)
+    
+    return _resposta_streaming(gerar(), 'ndjson', 'application/x-ndjson')
+
 # APIs para funcionalidade dinâmica
+@main_bp.route('/api/registros/bulk', methods=['POST'])
+@handle_errors
+@login_required
+def api_registros_bulk():
+    """Gravar registros de horas em massa (lista JSON de {funcionario_id, data, horas, observacoes})"""
+    dados = request.get_json(silent=True)
+    if isinstance(dados, dict):
+        dados = dados.get('registros')
+    if not isinstance(dados, list):
+        return jsonify({'success': False, 'message': 'Envie uma lista de registros'}), 400
+    
+    limite = current_app.config.get('IMPORTACAO_MAX_REGISTROS', 10000)
+    if len(dados) > limite:
+        return jsonify({'success': False, 'message': f'Máximo de {limite} registros por requisição'}), 413
+    
+    try:
+        resultados = importar_registros(dados)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erro na gravação em massa: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    totais = {status: 0 for status in ('criado', 'atualizado', 'ignorado', 'erro')}
+    for resultado in resultados:
+        totais[resultado['status']] += 1
+    
+    return jsonify({
+        'success': True,
+        'total': len(resultados),
+        'criados': totais['criado'],
+        'atualizados': totais['atualizado'],
+        'ignorados': totais['ignorado'],
+        'erros': totais['erro'],
+        'resultados': resultados
+    })
+
 @main_bp.route('/api/cargos', methods=['POST'])
 @handle_errors
 @login_required
@@ -710,25 +988,10 @@ def api_criar_area():
 def visualizar_resumos():
     """Visualizar resumos diários"""
     # Buscar resumos com filtros
-    funcionario_id = request.args.get('funcionario_id', type=int)
-    data_inicio = request.args.get('data_inicio')
-    data_fim = request.args.get('data_fim')
-    
-    query = ResumoDiario.query.options(
-        db.joinedload(ResumoDiario.funcionario).joinedload(Funcionario.cargo),
-        db.joinedload(ResumoDiario.funcionario).joinedload(Funcionario.area)
+    query = filtrar_registros(
+        ResumoDiario, carregar_funcionario=True, **_filtros_registros(request.args)
     )
     
-    # Aplicar filtros
-    if funcionario_id:
-        query = query.filter(ResumoDiario.funcionario_id == funcionario_id)
-    if data_inicio:
-        data_inicio_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-        query = query.filter(ResumoDiario.data >= data_inicio_obj)
-    if data_fim:
-        data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-        query = query.filter(ResumoDiario.data <= data_fim_obj)
-    
     resumos = query.order_by(ResumoDiario.data.desc()).limit(200).all()
     
     # Buscar funcionários para o filtro
@@ -736,28 +999,52 @@ def visualizar_resumos():
     
     return render_template('resumos_diarios.html', 
                          resumos=resumos,
-                         funcionarios=funcionarios)
+                         funcionarios=funcionarios,
+                         date=date,
+                         timedelta=timedelta,
+                         primeiro_dia_mes=date.today().replace(day=1))
 
 @main_bp.route('/resumos-diarios/gerar', methods=['POST'])
 @handle_errors
 @login_required
 def gerar_resumo_dia():
-    """Gerar resumo para um dia específico"""
+    """Gerar resumos para um dia ou período"""
     try:
-        data_str = request.form.get('data')
+        data_str = request.form.get('data_inicio') or request.form.get('data')
         if not data_str:
             flash('Data é obrigatória.', 'error')
             return redirect(url_for('main.visualizar_resumos'))
         
-        data_resumo = datetime.strptime(data_str, '%Y-%m-%d').date()
+        data_inicio = datetime.strptime(data_str, '%Y-%m-%d').date()
         
-        # Gerar resumo
-        resumos_criados = ResumoDiario.gerar_resumo_dia(data_resumo)
+        # Sem data final: dia único pelo campo 'data', ou até hoje pelos atalhos de período
+        data_fim_str = request.form.get('data_fim')
+        if data_fim_str:
+            data_fim = datetime.strptime(data_fim_str, '%Y-%m-%d').date()
+        elif request.form.get('data_inicio'):
+            data_fim = max(data_inicio, date.today())
+        else:
+            data_fim = data_inicio
         
-        flash(f'Resumo gerado com sucesso! {resumos_criados} registros criados para {data_resumo.strftime("%d/%m/%Y")}.', 'success')
+        if data_fim < data_inicio:
+            flash('Data final deve ser posterior à data inicial.', 'error')
+            return redirect(url_for('main.visualizar_resumos'))
+        
+        # Gerar resumos do período em uma única passada
+        resumos_criados = ResumoDiario.gerar_resumos_periodo(data_inicio, data_fim)
+        
+        if data_inicio == data_fim:
+            periodo = data_inicio.strftime("%d/%m/%Y")
+        else:
+            periodo = f'{data_inicio.strftime("%d/%m/%Y")} a {data_fim.strftime("%d/%m/%Y")}'
+        flash(f'Resumo gerado com sucesso! {resumos_criados} registros criados para {periodo}.', 'success')
         
+    except ValueError as e:
+        logger.error(f"Erro de validação: {e}")
+        flash('Data inválida.', 'error')
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Erro ao gerar resumo: {e}")
         flash('Erro ao gerar resumo diário.', 'error')
     
-    return redirect(url_for('main.visualizar_resumos'))
\ No newline at end of file
+    return redirect(url_for('main.visualizar_resumos'))
@@ -1,10 +1,21 @@
+# Geração das planilhas Excel. Este módulo carrega o openpyxl ao ser importado:
+# quem serve requisições deve importá-lo sob demanda (ver routes.exportar_excel
+# e exportacoes.submeter_exportacao), para que os workers não paguem esse custo no boot.
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 from datetime import datetime, date, timedelta
-from flask_app.models import RegistroHora, Funcionario
+from flask_app.relatorios import (
+    horas_por_funcionario_no_mes, horas_por_funcionario_e_mes, registros_com_cargo_area
+)
 import tempfile
-import os
+
+# Linhas buscadas por vez do banco ao gerar planilhas
+TAMANHO_LOTE_EXPORTACAO = 1000
+
+# Arquivos exportados até este tamanho ficam em memória; acima disso vão para disco
+LIMITE_SPOOL_EXPORTACAO = 8 * 1024 * 1024  # 8MB
 
 def gerar_relatorio_excel(tipo='mensal', funcionario_id=None, mes=None, ano=None):
     """
@@ -17,97 +28,114 @@ def gerar_relatorio_excel(tipo='mensal', funcionario_id=None, mes=None, ano=None
         ano (int): Ano para relatório
     
     Returns:
-        str: Caminho do arquivo Excel gerado
+        SpooledTemporaryFile: Arquivo posicionado no início. Fica em memória até
+        LIMITE_SPOOL_EXPORTACAO e é removido ao ser fechado - quem chama deve fechá-lo.
+    """
+    arquivo = tempfile.SpooledTemporaryFile(max_size=LIMITE_SPOOL_EXPORTACAO, suffix='.xlsx')
+    try:
+        escrever_relatorio_excel(arquivo, tipo, funcionario_id, mes, ano)
+    except Exception:
+        arquivo.close()
+        raise
+    
+    arquivo.seek(0)
+    return arquivo
+
+def escrever_relatorio_excel(destino, tipo='mensal', funcionario_id=None, mes=None, ano=None, progresso=None):
     """
+    Escreve o relatório Excel em `destino` (caminho ou arquivo binário) usando
+    um workbook write_only: as linhas são gravadas à medida que chegam do banco
+    e o consumo de memória não depende da quantidade de registros.
     
-    # Criar workbook
-    wb = Workbook()
-    ws = wb.active
+    `progresso`, se informado, é chamado com a quantidade de linhas já escritas.
+    """
+    wb = Workbook(write_only=True)
+    _registrar_estilos(wb)
     
-    # Configurar estilos
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="366092")
-    center_alignment = Alignment(horizontal="center", vertical="center")
+    if tipo == 'anual':
+        ws = wb.create_sheet("Relatório Anual")
+        linhas = _criar_planilha_anual(ws, _gerar_dados_anuais(funcionario_id, ano))
+    elif tipo == 'diario':
+        ws = wb.create_sheet("Relatório Diário")
+        linhas = _criar_planilha_diaria(ws, _gerar_dados_diarios(funcionario_id, mes, ano), progresso)
+    else:
+        ws = wb.create_sheet("Relatório Mensal")
+        linhas = _criar_planilha_mensal(ws, _gerar_dados_mensais(funcionario_id, mes, ano))
+    
+    wb.save(destino)
+    if progresso:
+        progresso(linhas)
+
+def _registrar_estilos(wb):
+    """Registra os estilos nomeados compartilhados por todas as células"""
     border = Border(
         left=Side(style='thin'),
         right=Side(style='thin'),
         top=Side(style='thin'),
         bottom=Side(style='thin')
     )
+    center_alignment = Alignment(horizontal="center", vertical="center")
     
-    if tipo == 'mensal':
-        ws.title = "Relatório Mensal"
-        dados = _gerar_dados_mensais(funcionario_id, mes, ano)
-        _criar_planilha_mensal(ws, dados, header_font, header_fill, center_alignment, border)
-    
-    elif tipo == 'anual':
-        ws.title = "Relatório Anual"
-        dados = _gerar_dados_anuais(funcionario_id, ano)
-        _criar_planilha_anual(ws, dados, header_font, header_fill, center_alignment, border)
-    
-    elif tipo == 'diario':
-        ws.title = "Relatório Diário"
-        dados = _gerar_dados_diarios(funcionario_id, mes, ano)
-        _criar_planilha_diaria(ws, dados, header_font, header_fill, center_alignment, border)
-    
-    # Criar arquivo temporário para envio
-    import tempfile
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
-    wb.save(temp_file.name)
-    temp_file.close()
-    
-    # Também salvar na pasta Downloads
-    downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
-    if not os.path.exists(downloads_path):
-        os.makedirs(downloads_path)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    nome_arquivo = f"relatorio_horas_{tipo}_{timestamp}.xlsx"
-    caminho_downloads = os.path.join(downloads_path, nome_arquivo)
-    
-    # Copiar para Downloads
-    import shutil
-    shutil.copy2(temp_file.name, caminho_downloads)
+    estilos = [
+        NamedStyle(name='titulo', font=Font(bold=True, size=14), alignment=center_alignment),
+        NamedStyle(
+            name='cabecalho',
+            font=Font(bold=True, color="FFFFFF"),
+            fill=PatternFill("solid", fgColor="366092"),
+            alignment=center_alignment,
+            border=border
+        ),
+        NamedStyle(name='celula', border=border),
+        NamedStyle(name='total', font=Font(bold=True), alignment=center_alignment, border=border),
+        NamedStyle(name='total_valor', font=Font(bold=True), border=border),
+    ]
+    for estilo in estilos:
+        wb.add_named_style(estilo)
+
+def _celula(ws, valor, estilo='celula'):
+    cell = WriteOnlyCell(ws, value=valor)
+    cell.style = estilo
+    return cell
+
+def _escrever_cabecalho(ws, titulo, headers, larguras):
+    """Larguras, título mesclado e cabeçalho das colunas (linhas 1 a 3)"""
+    # Em modo write_only as larguras precisam ser definidas antes das linhas
+    for i, largura in enumerate(larguras, 1):
+        ws.column_dimensions[get_column_letter(i)].width = largura
     
-    return temp_file.name
+    ws.append([_celula(ws, titulo, 'titulo')])
+    ws.merged_cells.add(f'A1:{get_column_letter(len(headers))}1')
+    ws.append([])
+    ws.append([_celula(ws, header, 'cabecalho') for header in headers])
+
+def _escrever_total(ws, row, colunas_rotulo, total):
+    """Linha de total geral com o rótulo mesclado nas primeiras colunas"""
+    ws.append([])
+    row += 1
+    ws.append(
+        [_celula(ws, "TOTAL GERAL", 'total')]
+        + [_celula(ws, None, 'total') for _ in range(colunas_rotulo - 1)]
+        + [_celula(ws, round(total, 2), 'total_valor')]
+    )
+    ws.merged_cells.add(f'A{row}:{get_column_letter(colunas_rotulo)}{row}')
 
 def _gerar_dados_mensais(funcionario_id=None, mes=None, ano=None):
-    """Gera dados para relatório mensal"""
+    """Gera dados para relatório mensal com a agregação feita no banco"""
     if not mes:
         mes = datetime.now().month
     if not ano:
         ano = datetime.now().year
     
-    query = RegistroHora.query.filter(
-        RegistroHora.data >= date(ano, mes, 1)
-    )
-    
-    # Último dia do mês
-    if mes == 12:
-        ultimo_dia = date(ano + 1, 1, 1) - timedelta(days=1)
-    else:
-        ultimo_dia = date(ano, mes + 1, 1) - timedelta(days=1)
-    
-    query = query.filter(RegistroHora.data <= ultimo_dia)
-    
-    if funcionario_id:
-        query = query.filter(RegistroHora.funcionario_id == funcionario_id)
-    
-    registros = query.order_by(RegistroHora.funcionario_id, RegistroHora.data).all()
-    
-    # Agrupar por funcionário
+    # Uma linha por funcionário, já com cargo e área
     dados_funcionarios = {}
-    for registro in registros:
-        func_id = registro.funcionario_id
-        if func_id not in dados_funcionarios:
-            dados_funcionarios[func_id] = {
-                'funcionario': registro.funcionario,
-                'registros': [],
-                'total_horas': 0
-            }
-        
-        dados_funcionarios[func_id]['registros'].append(registro)
-        dados_funcionarios[func_id]['total_horas'] += registro.horas
+    for linha in horas_por_funcionario_no_mes(ano, mes, funcionario_id):
+        dados_funcionarios[linha.funcionario_id] = {
+            'nome': linha.nome,
+            'cargo': linha.cargo,
+            'area': linha.area,
+            'total_registros': linha.total_registros or 0,
+            'total_horas': linha.total_horas or 0
+        }
     
     return {
         'funcionarios': dados_funcionarios,
@@ -116,36 +144,28 @@ def _gerar_dados_mensais(funcionario_id=None, mes=None, ano=None):
     }
 
 def _gerar_dados_anuais(funcionario_id=None, ano=None):
-    """Gera dados para relatório anual"""
+    """Gera dados para relatório anual com a agregação por mês feita no banco"""
     if not ano:
         ano = datetime.now().year
     
-    query = RegistroHora.query.filter(
-        RegistroHora.data >= date(ano, 1, 1),
-        RegistroHora.data <= date(ano, 12, 31)
-    )
-    
-    if funcionario_id:
-        query = query.filter(RegistroHora.funcionario_id == funcionario_id)
-    
-    registros = query.order_by(RegistroHora.funcionario_id, RegistroHora.data).all()
-    
-    # Agrupar por funcionário e mês
+    # No máximo 12 linhas por funcionário
     dados_funcionarios = {}
-    for registro in registros:
-        func_id = registro.funcionario_id
-        mes = registro.data.month
-        
-        if func_id not in dados_funcionarios:
-            dados_funcionarios[func_id] = {
-                'funcionario': registro.funcionario,
+    for linha in horas_por_funcionario_e_mes(ano, funcionario_id):
+        if linha.funcionario_id not in dados_funcionarios:
+            dados_funcionarios[linha.funcionario_id] = {
+                'nome': linha.nome,
+                'cargo': linha.cargo,
+                'area': linha.area,
                 'meses': {i: {'horas': 0, 'registros': 0} for i in range(1, 13)},
                 'total_horas': 0
             }
         
-        dados_funcionarios[func_id]['meses'][mes]['horas'] += registro.horas
-        dados_funcionarios[func_id]['meses'][mes]['registros'] += 1
-        dados_funcionarios[func_id]['total_horas'] += registro.horas
+        func_data = dados_funcionarios[linha.funcionario_id]
+        func_data['meses'][linha.mes] = {
+            'horas': linha.total_horas or 0,
+            'registros': linha.total_registros or 0
+        }
+        func_data['total_horas'] += linha.total_horas or 0
     
     return {
         'funcionarios': dados_funcionarios,
@@ -154,28 +174,22 @@ def _gerar_dados_anuais(funcionario_id=None, ano=None):
     }
 
 def _gerar_dados_diarios(funcionario_id=None, mes=None, ano=None):
-    """Gera dados para relatório diário"""
+    """Gera dados para relatório diário com cargo e área resolvidos em uma única consulta"""
     if not mes:
         mes = datetime.now().month
     if not ano:
         ano = datetime.now().year
     
-    query = RegistroHora.query.filter(
-        RegistroHora.data >= date(ano, mes, 1)
-    )
-    
     # Último dia do mês
     if mes == 12:
         ultimo_dia = date(ano + 1, 1, 1) - timedelta(days=1)
     else:
         ultimo_dia = date(ano, mes + 1, 1) - timedelta(days=1)
     
-    query = query.filter(RegistroHora.data <= ultimo_dia)
-    
-    if funcionario_id:
-        query = query.filter(RegistroHora.funcionario_id == funcionario_id)
-    
-    registros = query.order_by(RegistroHora.data, RegistroHora.funcionario_id).all()
+    # Iterador em lotes: as linhas vão direto para a planilha sem ficar em memória
+    registros = registros_com_cargo_area(
+        date(ano, mes, 1), ultimo_dia, funcionario_id
+    ).yield_per(TAMANHO_LOTE_EXPORTACAO)
     
     return {
         'registros': registros,
@@ -183,197 +197,101 @@ def _gerar_dados_diarios(funcionario_id=None, mes=None, ano=None):
         'tipo': 'diario'
     }
 
-def _criar_planilha_mensal(ws, dados, header_font, header_fill, center_alignment, border):
+def _criar_planilha_mensal(ws, dados):
     """Cria planilha de relatório mensal no formato solicitado"""
-    # Cabeçalho principal
-    ws.merge_cells('A1:D1')
-    ws['A1'] = f"RELATÓRIO MENSAL DE HORAS - {dados['periodo']}"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = center_alignment
-    
-    # Cabeçalhos das colunas
     headers = ['Área de Atuação', 'Cargo', 'Nome do Funcionário', 'Horas']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = border
+    larguras = [25, 20, 25, 15]  # Área, Cargo, Nome, Horas
+    _escrever_cabecalho(ws, f"RELATÓRIO MENSAL DE HORAS - {dados['periodo']}", headers, larguras)
+    
+    # Ordenar por área, cargo e nome (nomes já vêm resolvidos da consulta)
+    funcionarios_ordenados = sorted(
+        dados['funcionarios'].values(),
+        key=lambda x: (x['area'], x['cargo'], x['nome'])
+    )
     
-    # Dados dos funcionários - ordenados por área e cargo
+    # Dados dos funcionários
     row = 4
     total_geral_horas = 0
     
-    # Criar lista ordenada de funcionários
-    funcionarios_ordenados = []
-    for func_data in dados['funcionarios'].values():
-        funcionario = func_data['funcionario']
-        area_nome = funcionario.cargo.area.nome if funcionario.cargo and funcionario.cargo.area else 'N/A'
-        cargo_nome = funcionario.cargo.nome if funcionario.cargo else 'N/A'
-        
-        funcionarios_ordenados.append({
-            'area': area_nome,
-            'cargo': cargo_nome,
-            'funcionario': funcionario,
-            'horas': func_data['total_horas']
-        })
-    
-    # Ordenar por área e depois por cargo
-    funcionarios_ordenados.sort(key=lambda x: (x['area'], x['cargo'], x['funcionario'].nome))
-    
-    # Preencher dados na planilha
     for func_info in funcionarios_ordenados:
-        total_horas = round(func_info['horas'], 2)
+        total_horas = round(func_info['total_horas'], 2)
         
         # Só adicionar linha se funcionário tem horas registradas
         if total_horas > 0:
-            ws.cell(row=row, column=1, value=func_info['area']).border = border
-            ws.cell(row=row, column=2, value=func_info['cargo']).border = border
-            ws.cell(row=row, column=3, value=func_info['funcionario'].nome).border = border
-            ws.cell(row=row, column=4, value=total_horas).border = border
-            
+            ws.append([
+                _celula(ws, func_info['area']),
+                _celula(ws, func_info['cargo']),
+                _celula(ws, func_info['nome']),
+                _celula(ws, total_horas)
+            ])
             total_geral_horas += total_horas
             row += 1
     
     # Total geral
     if row > 4:  # Se há dados
-        row += 1
-        ws.merge_cells(f'A{row}:C{row}')
-        ws[f'A{row}'] = "TOTAL GERAL"
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'A{row}'].alignment = center_alignment
-        ws[f'A{row}'].border = border
-        ws[f'D{row}'] = round(total_geral_horas, 2)
-        ws[f'D{row}'].font = Font(bold=True)
-        ws[f'D{row}'].border = border
+        _escrever_total(ws, row, 3, total_geral_horas)
     
-    # Ajustar largura das colunas
-    larguras = [25, 20, 25, 15]  # Área, Cargo, Nome, Horas
-    for i, largura in enumerate(larguras, 1):
-        ws.column_dimensions[get_column_letter(i)].width = largura
+    return row - 4
 
-def _criar_planilha_anual(ws, dados, header_font, header_fill, center_alignment, border):
+def _criar_planilha_anual(ws, dados):
     """Cria planilha de relatório anual organizado por área e cargo"""
-    # Cabeçalho principal
-    ws.merge_cells('A1:P1')
-    ws['A1'] = f"RELATÓRIO ANUAL DE HORAS - {dados['ano']}"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = center_alignment
-    
-    # Cabeçalhos das colunas
     meses = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 
              'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
     headers = ['Área de Atuação', 'Cargo', 'Nome do Funcionário'] + meses + ['Total']
+    larguras = [25, 20, 25] + [10] * 12 + [12]  # Área, Cargo, Nome, 12 meses, Total
+    _escrever_cabecalho(ws, f"RELATÓRIO ANUAL DE HORAS - {dados['ano']}", headers, larguras)
     
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = border
-    
-    # Organizar funcionários por área e cargo
-    funcionarios_ordenados = []
-    for func_data in dados['funcionarios'].values():
-        funcionario = func_data['funcionario']
-        area_nome = funcionario.cargo.area.nome if funcionario.cargo and funcionario.cargo.area else 'N/A'
-        cargo_nome = funcionario.cargo.nome if funcionario.cargo else 'N/A'
-        
-        funcionarios_ordenados.append({
-            'area': area_nome,
-            'cargo': cargo_nome,
-            'funcionario': funcionario,
-            'meses': func_data['meses'],
-            'total_horas': func_data['total_horas']
-        })
-    
-    # Ordenar por área e depois por cargo
-    funcionarios_ordenados.sort(key=lambda x: (x['area'], x['cargo'], x['funcionario'].nome))
+    # Organizar funcionários por área, cargo e nome
+    funcionarios_ordenados = sorted(
+        dados['funcionarios'].values(),
+        key=lambda x: (x['area'], x['cargo'], x['nome'])
+    )
     
-    # Dados dos funcionários
-    row = 4
+    linhas = 0
     for func_info in funcionarios_ordenados:
         # Só incluir funcionários com horas registradas
         if func_info['total_horas'] > 0:
-            ws.cell(row=row, column=1, value=func_info['area']).border = border
-            ws.cell(row=row, column=2, value=func_info['cargo']).border = border
-            ws.cell(row=row, column=3, value=func_info['funcionario'].nome).border = border
-            
+            linha = [
+                _celula(ws, func_info['area']),
+                _celula(ws, func_info['cargo']),
+                _celula(ws, func_info['nome'])
+            ]
             for mes in range(1, 13):
                 horas = round(func_info['meses'][mes]['horas'], 2)
-                ws.cell(row=row, column=mes + 3, value=horas if horas > 0 else '-').border = border
-            
-            total = round(func_info['total_horas'], 2)
-            ws.cell(row=row, column=16, value=total).border = border
-            row += 1
+                linha.append(_celula(ws, horas if horas > 0 else '-'))
+            linha.append(_celula(ws, round(func_info['total_horas'], 2)))
+            ws.append(linha)
+            linhas += 1
     
-    # Ajustar largura das colunas
-    larguras = [25, 20, 25] + [10] * 12 + [12]  # Área, Cargo, Nome, 12 meses, Total
-    for i, largura in enumerate(larguras, 1):
-        ws.column_dimensions[get_column_letter(i)].width = largura
+    return linhas
 
-def _criar_planilha_diaria(ws, dados, header_font, header_fill, center_alignment, border):
+def _criar_planilha_diaria(ws, dados, progresso=None):
     """Cria planilha de relatório diário organizado por área e cargo"""
-    # Cabeçalho principal  
-    ws.merge_cells('A1:E1')
-    ws['A1'] = f"RELATÓRIO DIÁRIO DE HORAS - {dados['periodo']}"
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A1'].alignment = center_alignment
-    
-    # Cabeçalhos das colunas
     headers = ['Área de Atuação', 'Cargo', 'Nome do Funcionário', 'Data', 'Horas']
+    larguras = [25, 20, 25, 15, 15]  # Área, Cargo, Nome, Data, Horas
+    _escrever_cabecalho(ws, f"RELATÓRIO DIÁRIO DE HORAS - {dados['periodo']}", headers, larguras)
     
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = border
-    
-    # Organizar registros por área/cargo/funcionário
-    registros_organizados = []
-    for registro in dados['registros']:
-        area_nome = registro.funcionario.cargo.area.nome if registro.funcionario.cargo and registro.funcionario.cargo.area else 'N/A'
-        cargo_nome = registro.funcionario.cargo.nome if registro.funcionario.cargo else 'N/A'
-        
-        registros_organizados.append({
-            'area': area_nome,
-            'cargo': cargo_nome,
-            'funcionario': registro.funcionario.nome,
-            'data': registro.data.strftime('%d/%m/%Y'),
-            'horas': round(registro.horas, 2)
-        })
-    
-    # Ordenar por área, cargo, funcionário e data
-    registros_organizados.sort(key=lambda x: (x['area'], x['cargo'], x['funcionario'], x['data']))
-    
-    # Preencher dados na planilha
+    # Registros já vêm ordenados por área, cargo, funcionário e data
     row = 4
     total_horas = 0
     
-    for reg in registros_organizados:
-        ws.cell(row=row, column=1, value=reg['area']).border = border
-        ws.cell(row=row, column=2, value=reg['cargo']).border = border
-        ws.cell(row=row, column=3, value=reg['funcionario']).border = border
-        ws.cell(row=row, column=4, value=reg['data']).border = border
-        ws.cell(row=row, column=5, value=reg['horas']).border = border
-        
-        total_horas += reg['horas']
+    for registro in dados['registros']:
+        horas = round(registro.horas, 2)
+        ws.append([
+            _celula(ws, registro.area),
+            _celula(ws, registro.cargo),
+            _celula(ws, registro.nome),
+            _celula(ws, registro.data.strftime('%d/%m/%Y')),
+            _celula(ws, horas)
+        ])
+        total_horas += horas
         row += 1
+        
+        if progresso and (row - 4) % TAMANHO_LOTE_EXPORTACAO == 0:
+            progresso(row - 4)
     
     # Total geral
     if row > 4:  # Se há dados
-        row += 1
-        ws.merge_cells(f'A{row}:D{row}')
-        ws[f'A{row}'] = "TOTAL GERAL"
-        ws[f'A{row}'].font = Font(bold=True)
-        ws[f'A{row}'].alignment = center_alignment
-        ws[f'A{row}'].border = border
-        ws[f'E{row}'] = round(total_horas, 2)
-        ws[f'E{row}'].font = Font(bold=True)
-        ws[f'E{row}'].border = border
+        _escrever_total(ws, row, 4, total_horas)
     
-    # Ajustar largura das colunas
-    larguras = [25, 20, 25, 15, 15]  # Área, Cargo, Nome, Data, Horas
-    for i, largura in enumerate(larguras, 1):
-        ws.column_dimensions[get_column_letter(i)].width = largura
\ No newline at end of file
+    return row - 4
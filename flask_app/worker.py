@@ -0,0 +1,66 @@
+"""
+Worker de resumos diários
+Drena a fila DiaPendente em lotes, recalculando os resumos pelo upsert em massa.
+Pode rodar como thread dentro do processo web ou pelo script worker_resumos.py.
+"""
+
+import logging
+import threading
+import time
+
+from flask_app.models import db, DiaPendente, TAMANHO_LOTE_RESUMOS
+
+logger = logging.getLogger(__name__)
+
+
+def drenar_fila(tamanho_lote=TAMANHO_LOTE_RESUMOS):
+    """Processa lotes até a fila esvaziar. Retorna o total de dias processados."""
+    total = 0
+    while True:
+        processados = DiaPendente.processar_lote(tamanho_lote)
+        total += processados
+        if processados < tamanho_lote:
+            return total
+
+
+def executar_worker(app, intervalo=2, tamanho_lote=TAMANHO_LOTE_RESUMOS, parar=None):
+    """Loop do worker: drena a fila e aguarda `intervalo` segundos quando vazia"""
+    parar = parar or threading.Event()
+    logger.info(f"Worker de resumos iniciado (intervalo={intervalo}s, lote={tamanho_lote})")
+
+    while not parar.is_set():
+        with app.app_context():
+            try:
+                processados = drenar_fila(tamanho_lote)
+                if processados:
+                    logger.info(f"Worker de resumos: {processados} dias recalculados")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Erro no worker de resumos: {e}")
+            finally:
+                db.session.remove()
+        parar.wait(intervalo)
+
+
+def iniciar_worker_em_thread(app):
+    """Inicia o worker como thread daemon dentro do processo atual"""
+    parar = threading.Event()
+    thread = threading.Thread(
+        target=executar_worker,
+        args=(app, app.config.get('RESUMOS_WORKER_INTERVALO', 2)),
+        kwargs={'parar': parar},
+        name='worker-resumos',
+        daemon=True
+    )
+    thread.start()
+    return thread, parar
+
+
+def iniciar_se_configurado(app):
+    """
+    Inicia a thread do worker quando RESUMOS_MODO = 'fila' e RESUMOS_WORKER_THREAD
+    estão ativos. Com vários processos cada um drena a fila (ver DiaPendente.processar_lote).
+    """
+    if app.config['RESUMOS_MODO'] == 'fila' and app.config['RESUMOS_WORKER_THREAD']:
+        return iniciar_worker_em_thread(app)
+    return None
@@ -0,0 +1,145 @@
+"""
+Configuração do Gunicorn - Sistema de Banco de Horas
+Perfil de produção com vários processos e threads (gthread), dimensionado
+pela quantidade de CPUs e pela memória disponível no container.
+
+Uso:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Variáveis de ambiente (todas opcionais):
+    WEB_CONCURRENCY              Processos (padrão: calculado por CPU e memória)
+    GUNICORN_THREADS             Threads por processo (padrão: 4)
+    GUNICORN_MEMORIA_WORKER_MB   Memória estimada por processo (padrão: 160)
+    GUNICORN_TIMEOUT             Segundos sem resposta do worker (padrão: 120)
+    GUNICORN_MAX_REQUESTS        Requisições até reciclar o processo (padrão: 1000)
+"""
+
+import multiprocessing
+import os
+
+# Memória reservada ao processo mestre e ao sistema
+MEMORIA_RESERVADA_MB = 64
+
+
+def _ler_inteiro(caminho):
+    try:
+        with open(caminho) as arquivo:
+            valor = arquivo.read().split()[0]
+    except (OSError, IndexError):
+        return None
+    return int(valor) if valor.isdigit() else None
+
+
+def memoria_disponivel_mb():
+    """Limite de memória do container (cgroup v2/v1) ou a memória livre do sistema"""
+    limite = _ler_inteiro('/sys/fs/cgroup/memory.max') or _ler_inteiro(
+        '/sys/fs/cgroup/memory/memory.limit_in_bytes'
+    )
+    # cgroup v1 sem limite reporta um valor próximo de 2^63
+    if limite and limite < 1 << 60:
+        return limite // (1024 * 1024)
+
+    try:
+        with open('/proc/meminfo') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('MemAvailable:'):
+                    return int(linha.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def calcular_workers(cpus, memoria_mb, memoria_por_worker_mb):
+    """2 x CPUs + 1, limitado pelo que cabe na memória, no mínimo 1"""
+    workers = 2 * cpus + 1
+    if memoria_mb:
+        workers = min(workers, (memoria_mb - MEMORIA_RESERVADA_MB) // memoria_por_worker_mb)
+    return max(1, workers)
+
+
+_cpus = multiprocessing.cpu_count()
+_memoria_mb = memoria_disponivel_mb()
+_memoria_por_worker_mb = int(os.environ.get('GUNICORN_MEMORIA_WORKER_MB', 160))
+
+workers = int(os.environ.get('WEB_CONCURRENCY') or calcular_workers(_cpus, _memoria_mb, _memoria_por_worker_mb))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# config.py dimensiona o pool de conexões a partir destes valores
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['GUNICORN_THREADS'] = str(threads)
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '10000')}"
+
+# A aplicação é criada uma vez no mestre e compartilhada (copy-on-write) pelos
+# workers. Threads e conexões não sobrevivem ao fork: o worker de resumos é
+# iniciado em post_fork e o pool do banco é descartado antes dos forks.
+preload_app = True
+os.environ['ADIAR_THREADS'] = '1'
+
+# Recicla cada processo depois de N requisições (com variação, para que os
+# workers não reiniciem juntos), limitando o crescimento de memória
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Heartbeat dos workers em memória, evitando travas em discos lentos do container
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+
+def _descartar_conexoes(app, fechar):
+    from flask_app.models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=fechar)
+
+
+def _conferir_geracoes_cache(server, app):
+    from flask_app.cache import obter_cache
+    from flask_app.models import db, GeracaoCache
+    with app.app_context():
+        if obter_cache().compartilhado or db.inspect(db.engine).has_table(GeracaoCache.__tablename__):
+            return
+    # Banco não migrado (gunicorn iniciado sem init_db.py): sem gerações, o
+    # cache local só se corrige pelo tempo de vida, então ele fica curto
+    ttl = min(app.config['CACHE_DEFAULT_TIMEOUT'], app.config['CACHE_TIMEOUT_SEM_GERACOES'])
+    app.config['CACHE_GERACOES'] = False
+    app.config['CACHE_DEFAULT_TIMEOUT'] = ttl
+    server.log.error(
+        f"⚠️ Tabela geracoes_cache ausente: rode python init_db.py. Até lá, uma gravação "
+        f"em um processo só chega ao cache local dos outros quando o valor expira ({ttl}s)"
+    )
+
+
+def when_ready(server):
+    memoria = f"{_memoria_mb}MB" if _memoria_mb else "desconhecida"
+    server.log.info(
+        f"🚀 {workers} worker(s) gthread x {threads} thread(s) "
+        f"(CPUs: {_cpus}, memória: {memoria}, {_memoria_por_worker_mb}MB por worker)"
+    )
+    app = server.app.wsgi()
+    # Cache local (CACHE_TYPE=simple ou Redis indisponível) com vários workers,
+    # ou com o worker_resumos.py em outro processo: cada valor guardado é
+    # conferido contra a geração da chave na tabela geracoes_cache, então a
+    # gravação feita em um processo vale para todos. A tabela é criada pelo
+    # init_db.py (start.py e a fase release do Procfile o executam antes)
+    _conferir_geracoes_cache(server, app)
+    # O mestre não atende requisições: fecha as conexões abertas ao criar a aplicação
+    _descartar_conexoes(app, fechar=True)
+
+
+def post_fork(server, worker):
+    app = server.app.wsgi()
+    # Conexões herdadas do mestre pertencem a ele; o worker abre as suas
+    _descartar_conexoes(app, fechar=False)
+
+    from flask_app.worker import iniciar_se_configurado
+    iniciar_se_configurado(app)
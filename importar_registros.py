@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Importação de Registros de Horas
+Importa planilhas CSV ou XLSX grandes (acima do limite de upload) em lotes,
+com memória limitada ao lote.
+
+Colunas: funcionario (nome) ou funcionario_id, data, horas, observacoes
+
+Uso:
+    python importar_registros.py planilha.csv
+    python importar_registros.py planilha.xlsx --lote 5000
+"""
+
+import argparse
+import os
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa registros de horas de planilhas CSV ou XLSX')
+    parser.add_argument('arquivo', help='Caminho da planilha (.csv ou .xlsx)')
+    parser.add_argument('--formato', choices=('csv', 'xlsx'), help='Formato (padrão: pela extensão)')
+    parser.add_argument('--lote', type=int, default=None, help='Linhas gravadas por lote')
+    args = parser.parse_args()
+
+    formato = args.formato or os.path.splitext(args.arquivo)[1].lower().lstrip('.')
+    if formato not in ('csv', 'xlsx'):
+        print("❌ Formato não reconhecido. Use --formato csv ou --formato xlsx")
+        return 1
+
+    from wsgi import app
+    from flask_app.importacao import importar_arquivo
+    from flask_app.models import TAMANHO_LOTE_REGISTROS
+
+    def progresso(relatorio):
+        print(f"  ⏳ {relatorio['linhas']} linhas lidas ({relatorio['linhas_por_segundo']} linhas/s)")
+
+    print(f"📥 Importando {args.arquivo}...")
+    with app.app_context(), open(args.arquivo, 'rb') as arquivo:
+        try:
+            relatorio = importar_arquivo(
+                arquivo, formato,
+                tamanho_lote=args.lote or TAMANHO_LOTE_REGISTROS,
+                progresso=progresso
+            )
+        except ValueError as e:
+            print(f"❌ Planilha inválida: {e}")
+            return 1
+
+    print(f"\n✅ {relatorio['linhas']} linhas em {relatorio['segundos']}s ({relatorio['linhas_por_segundo']} linhas/s)")
+    print(f"   Criados: {relatorio['criados']}")
+    print(f"   Atualizados: {relatorio['atualizados']}")
+    print(f"   Ignorados (repetidos no arquivo): {relatorio['ignorados']}")
+    print(f"   Rejeitados: {relatorio['rejeitados']}")
+    for rejeicao in relatorio['rejeicoes']:
+        print(f"   ❌ Linha {rejeicao['linha']}: {rejeicao['erro']}")
+    if relatorio['rejeitados'] > len(relatorio['rejeicoes']):
+        print(f"   ... e mais {relatorio['rejeitados'] - len(relatorio['rejeicoes'])} rejeições")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,122 +1,122 @@
 #!/usr/bin/env python3
 """
 Script de Inicialização para Deploy no Render
-Cria as tabelas do banco e dados iniciais necessários.
+Cria as tabelas do banco, aplica as migrações e os dados iniciais necessários.
+
+É o passo explícito de schema do deploy: a aplicação (wsgi.py) não consulta o
+banco ao ser importada. Rode antes de subir o servidor (start.py já faz isso):
+    python init_db.py
+
+O primeiro administrador é criado pela tela /setup, ou aqui quando
+ADMIN_USERNAME e ADMIN_PASSWORD estiverem definidos.
+
+Com --estrito (usado por start.py e pela fase release do Procfile) qualquer falha
+encerra com código 1, também no Render: o servidor não sobe com o schema pela metade.
 """
 
+import argparse
 import os
 import sys
-from datetime import datetime
+
+AREAS_PADRAO = [
+    {'nome': 'Tecnologia', 'descricao': 'Área de desenvolvimento e suporte técnico'},
+    {'nome': 'Recursos Humanos', 'descricao': 'Gestão de pessoas e processos'},
+    {'nome': 'Financeiro', 'descricao': 'Controladoria e gestão financeira'},
+    {'nome': 'Comercial', 'descricao': 'Vendas e relacionamento com clientes'},
+    {'nome': 'Operações', 'descricao': 'Processos operacionais e logística'}
+]
+
+CARGOS_TECNOLOGIA = ['Desenvolvedor', 'Analista de Sistemas', 'Administrador']
+
+
+def criar_dados_iniciais(db):
+    """Áreas e cargos padrão (apenas os que ainda não existem) e o admin opcional"""
+    from werkzeug.security import generate_password_hash
+    from flask_app.models import AreaAtuacao, Cargo, Usuario
+
+    existentes = {nome for nome, in db.session.query(AreaAtuacao.nome)}
+    for area_data in AREAS_PADRAO:
+        if area_data['nome'] not in existentes:
+            db.session.add(AreaAtuacao(**area_data))
+            print(f"  ➕ Área criada: {area_data['nome']}")
+    db.session.flush()
+
+    area_tech = AreaAtuacao.query.filter_by(nome='Tecnologia').first()
+    cargos_existentes = {nome for nome, in db.session.query(Cargo.nome).filter_by(area_id=area_tech.id)}
+    for nome in CARGOS_TECNOLOGIA:
+        if nome not in cargos_existentes:
+            db.session.add(Cargo(nome=nome, area_id=area_tech.id))
+            print(f"  💼 Cargo criado: {nome}")
+
+    username = os.environ.get('ADMIN_USERNAME')
+    password = os.environ.get('ADMIN_PASSWORD')
+    if Usuario.query.filter_by(is_admin=True).first():
+        print("👤 Usuário admin já existe, pulando criação...")
+    elif username and password:
+        db.session.add(Usuario(
+            username=username,
+            password_hash=generate_password_hash(password),
+            is_admin=True
+        ))
+        print(f"👤 Usuário admin criado: {username}")
+    else:
+        print("👤 Nenhum admin: o primeiro acesso abrirá a tela /setup")
+
+    db.session.commit()
+
 
 def init_database():
     """Inicializa o banco de dados no Render"""
-    
+
     print("🔧 Iniciando configuração do banco de dados...")
-    
+
     # Verificar se DATABASE_URL está configurado
     if not os.environ.get('DATABASE_URL'):
         print("⚠️ DATABASE_URL não configurado - usando SQLite local")
-    
+
     try:
-        # Importar a aplicação
-        from app import app
-        print("✅ Aplicação importada com sucesso")
+        from app import create_app
+        app = create_app()
+        print("✅ Aplicação criada com sucesso")
     except Exception as e:
-        print(f"❌ Erro ao importar aplicação: {e}")
+        print(f"❌ Erro ao criar aplicação: {e}")
         return False
-    
+
     with app.app_context():
-        print("📊 Importando modelos...")
-        from flask_app.models import db, Usuario, AreaAtuacao, Cargo
-        
-        print("🗄️ Criando tabelas...")
+        from flask_app.models import db, criar_estrutura
+
+        print("🗄️ Criando tabelas e aplicando migrações...")
         try:
-            # Criar todas as tabelas
-            db.create_all()
-            print("✅ Tabelas criadas com sucesso!")
-            
-            # Verificar se já existem dados
-            admin_exists = Usuario.query.filter_by(is_admin=True).first()
-            if admin_exists:
-                print("👤 Usuário admin já existe, pulando criação...")
-                return
-            
-            print("👥 Criando dados iniciais...")
-            
-            # Criar áreas de atuação padrão
-            areas_padrao = [
-                {'nome': 'Tecnologia', 'descricao': 'Área de desenvolvimento e suporte técnico'},
-                {'nome': 'Recursos Humanos', 'descricao': 'Gestão de pessoas e processos'},
-                {'nome': 'Financeiro', 'descricao': 'Controladoria e gestão financeira'},
-                {'nome': 'Comercial', 'descricao': 'Vendas e relacionamento com clientes'},
-                {'nome': 'Operações', 'descricao': 'Processos operacionais e logística'}
-            ]
-            
-            for area_data in areas_padrao:
-                if not AreaAtuacao.query.filter_by(nome=area_data['nome']).first():
-                    area = AreaAtuacao(
-                        nome=area_data['nome'],
-                        descricao=area_data['descricao']
-                    )
-                    db.session.add(area)
-                    print(f"  ➕ Área criada: {area_data['nome']}")
-            
-            # Commit das áreas
-            db.session.commit()
-            
-            # Criar cargos padrão para Tecnologia
-            area_tech = AreaAtuacao.query.filter_by(nome='Tecnologia').first()
-            if area_tech:
-                cargos_tech = [
-                    {'nome': 'Desenvolvedor', 'descricao': 'Desenvolvimento de software'},
-                    {'nome': 'Analista de Sistemas', 'descricao': 'Análise e design de sistemas'},
-                    {'nome': 'Administrador', 'descricao': 'Administração do sistema'}
-                ]
-                
-                for cargo_data in cargos_tech:
-                    if not Cargo.query.filter_by(nome=cargo_data['nome'], area_atuacao_id=area_tech.id).first():
-                        cargo = Cargo(
-                            nome=cargo_data['nome'],
-                            descricao=cargo_data['descricao'],
-                            area_atuacao_id=area_tech.id
-                        )
-                        db.session.add(cargo)
-                        print(f"  💼 Cargo criado: {cargo_data['nome']}")
-            
-            # Criar usuário admin padrão
-            cargo_admin = Cargo.query.filter_by(nome='Administrador').first()
-            if cargo_admin and not Usuario.query.filter_by(username='admin').first():
-                admin_user = Usuario(
-                    username='admin',
-                    email='admin@sistema.com',
-                    nome_completo='Administrador do Sistema',
-                    is_admin=True,
-                    cargo_id=cargo_admin.id,
-                    data_admissao=datetime.now().date(),
-                    ativo=True
-                )
-                admin_user.set_password('admin123')  # Senha padrão - DEVE SER ALTERADA!
-                db.session.add(admin_user)
-                print("👤 Usuário admin criado (username: admin, senha: admin123)")
-                print("⚠️  IMPORTANTE: Altere a senha do admin após o primeiro login!")
-            
-            # Commit final
-            db.session.commit()
-            print("✅ Dados iniciais criados com sucesso!")
-            
+            criar_estrutura()
+            print("✅ Estrutura do banco atualizada!")
+
+            print("👥 Verificando dados iniciais...")
+            criar_dados_iniciais(db)
+            print("✅ Dados iniciais verificados!")
         except Exception as e:
             print(f"❌ Erro ao criar banco de dados: {str(e)}")
             db.session.rollback()
             raise e
-    
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
     print("🎉 Inicialização do banco concluída!")
 
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cria e migra o banco de dados')
+    parser.add_argument('--estrito', action='store_true', help='Falhas encerram com código 1, também no Render')
+    args = parser.parse_args()
+
     try:
         success = init_database()
         if success is not False:
             print("🚀 Sistema pronto para uso no Render!")
             sys.exit(0)
+        elif args.estrito:
+            print("💥 Inicialização pulada: a aplicação não pôde ser criada")
+            sys.exit(1)
         else:
             print("⚠️ Inicialização pulada - não é erro crítico")
             sys.exit(0)
@@ -125,8 +125,8 @@ if __name__ == '__main__':
         import traceback
         traceback.print_exc()
         # Em ambiente de build, não falhar por problemas de DB
-        if os.environ.get('RENDER'):
+        if os.environ.get('RENDER') and not args.estrito:
             print("🔧 Ambiente Render detectado - continuando build...")
             sys.exit(0)
         else:
-            sys.exit(1)
\ No newline at end of file
+            sys.exit(1)
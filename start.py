@@ -1,85 +1,73 @@
 #!/usr/bin/env python3
 """
 Script de inicialização para Render
-Garante que a aplicação seja iniciada corretamente independente da configuração
+Prepara o banco (init_db.py) e substitui o processo pelo Gunicorn com wsgi:app.
+A aplicação é importada uma única vez, pelo Gunicorn, sem consultas ao banco.
+
+Se as migrações falharem o Gunicorn não é iniciado. Elas rodam sem limite de
+tempo (preenchimentos longos dos consolidados não são interrompidos); INIT_DB_TIMEOUT
+define um limite em segundos.
+
+DEBUG_RENDER=1 executa antes o diagnóstico completo (debug_render.py).
 """
 
 import os
 import sys
 import subprocess
-import time
+
+
+def executar(script, *argumentos, timeout=None):
+    """Executa o script repassando a saída; retorna True se terminou com sucesso"""
+    try:
+        result = subprocess.run([sys.executable, script, *argumentos], timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print(f"❌ {script} excedeu {timeout}s")
+        return False
+    except Exception as e:
+        print(f"❌ Erro em {script}: {e}")
+        return False
+    return result.returncode == 0
+
 
 def main():
     print("🚀 RENDER STARTUP SCRIPT")
     print("=" * 50)
-    
-    # 1. Debug do ambiente
-    print("📊 1. Executando diagnóstico...")
-    try:
-        result = subprocess.run([sys.executable, "debug_render.py"], 
-                              capture_output=True, text=True, timeout=60)
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
-    except Exception as e:
-        print(f"❌ Erro no debug: {e}")
-    
-    # 2. Inicializar banco de dados
-    print("📊 2. Inicializando banco de dados...")
-    try:
-        result = subprocess.run([sys.executable, "init_db.py"], 
-                              capture_output=True, text=True, timeout=120)
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
-    except Exception as e:
-        print(f"❌ Erro na inicialização do banco: {e}")
-    
-    # 3. Verificar se run.py funciona
-    print("📊 3. Testando run.py...")
-    try:
-        result = subprocess.run([sys.executable, "-c", "from run import app; print('✅ run.py OK')"], 
-                              capture_output=True, text=True, timeout=30)
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
-    except Exception as e:
-        print(f"❌ Erro no teste do run.py: {e}")
-    
-    # 4. Iniciar Gunicorn
-    print("📊 4. Iniciando Gunicorn...")
-    
+
+    # 1. Debug do ambiente (opcional: importa a aplicação e custa segundos no cold start)
+    if os.environ.get('DEBUG_RENDER') == '1':
+        print("📊 Executando diagnóstico...")
+        executar("debug_render.py", timeout=60)
+
+    # 2. Tabelas, migrações e dados iniciais
+    print("📊 Inicializando banco de dados...")
+    timeout = os.environ.get('INIT_DB_TIMEOUT')
+    if not executar("init_db.py", "--estrito", timeout=int(timeout) if timeout else None):
+        print("💥 Migrações falharam: o Gunicorn não será iniciado com o schema incompleto")
+        sys.exit(1)
+
+    # 3. Iniciar Gunicorn
+    print("📊 Iniciando Gunicorn...")
+
     port = os.environ.get('PORT', '10000')
     host = os.environ.get('HOST', '0.0.0.0')
-    
+
     print(f"🌐 Configuração de rede: {host}:{port}")
-    
-    # Tentar diferentes configurações de app
-    app_configs = ['run:app', 'run:application', 'main:app', 'app:app', 'application:app']
-    
-    for app_config in app_configs:
-        print(f"🔧 Tentando: {app_config}")
-        
-        cmd = [
-            'gunicorn',
-            '--workers=1',
-            '--timeout=300', 
-            '--keep-alive=2',
-            f'--bind={host}:{port}',
-            '--access-logfile=-',
-            '--error-logfile=-',
-            app_config
-        ]
-        
-        try:
-            print(f"🚀 Executando: {' '.join(cmd)}")
-            os.execvp('gunicorn', cmd)  # Substitui o processo atual
-        except Exception as e:
-            print(f"❌ Falha com {app_config}: {e}")
-            continue
-    
-    print("❌ ERRO: Todas as configurações falharam!")
+
+    # Workers, threads, timeouts e logs vêm de gunicorn.conf.py
+    cmd = [
+        'gunicorn',
+        '-c', 'gunicorn.conf.py',
+        f'--bind={host}:{port}',
+        'wsgi:app'
+    ]
+
+    try:
+        print(f"🚀 Executando: {' '.join(cmd)}")
+        os.execvp('gunicorn', cmd)  # Substitui o processo atual
+    except Exception as e:
+        print(f"❌ Falha ao iniciar o Gunicorn: {e}")
+
     sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
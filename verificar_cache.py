@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Script de Verificação do Cache de Indicadores
+Simula dois processos do gunicorn com cache local (duas aplicações, cada uma
+com o seu CacheLocal, sobre o mesmo banco SQLite temporário) e garante que uma
+gravação confirmada em um deles invalida o valor guardado no outro, inclusive
+quando quem grava é o worker de resumos (RESUMOS_MODO=fila), em outro processo.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+
+def criar_app_teste(caminho_banco, intervalo_geracoes=0):
+    os.environ['DATABASE_URL'] = f'sqlite:///{caminho_banco}'
+    os.environ.setdefault('FLASK_ENV', 'development')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import create_app
+    app = create_app()
+    app.config['CACHE_TYPE'] = 'simple'
+    # Com intervalo 0 as gerações são relidas a cada leitura e o script não espera
+    app.config['CACHE_GERACOES_INTERVALO'] = intervalo_geracoes
+    return app
+
+
+def contar_consultas_geracoes(app, funcao):
+    """Executa `funcao` contando as consultas à tabela geracoes_cache"""
+    from sqlalchemy import event
+    from flask_app.models import db
+
+    contador = {'total': 0}
+
+    def ao_executar(conn, cursor, statement, parameters, context, executemany):
+        if 'geracoes_cache' in statement:
+            contador['total'] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', ao_executar)
+    try:
+        funcao()
+    finally:
+        event.remove(engine, 'before_cursor_execute', ao_executar)
+    return contador['total']
+
+
+class Contador:
+    """Função de cálculo que conta quantas vezes o cache precisou recalcular"""
+
+    def __init__(self, calcular):
+        self.calcular = calcular
+        self.chamadas = 0
+
+    def __call__(self):
+        self.chamadas += 1
+        return self.calcular()
+
+
+def ler(app, chave, calcular):
+    """memorizar() dentro de uma requisição da aplicação (um "processo")"""
+    from flask_app import cache
+    with app.test_request_context():
+        return cache.memorizar(chave, calcular)
+
+
+def verificar(descricao, obtido, esperado):
+    ok = obtido == esperado
+    print(f"  {'✅' if ok else '❌'} {descricao}: {obtido} (esperado {esperado})")
+    return ok
+
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_banco = os.path.join(pasta, 'cache.db')
+        processo_a = criar_app_teste(caminho_banco)
+        processo_b = criar_app_teste(caminho_banco)
+
+        from flask_app.cache import chave_horas_mes
+        from flask_app.models import (
+            db, criar_estrutura, AreaAtuacao, Cargo, Funcionario, GeracaoCache, RegistroHora, ResumoMensal
+        )
+
+        with processo_a.app_context():
+            criar_estrutura()
+
+        def contar_areas():
+            return AreaAtuacao.query.filter_by(ativo=True).count()
+
+        def horas_mes():
+            return float(db.session.query(
+                db.func.coalesce(db.func.sum(ResumoMensal.total_horas), 0)
+            ).filter(ResumoMensal.ano == 2026, ResumoMensal.mes == 3).scalar())
+
+        resultados = []
+        print("🔍 Contagem de áreas com dois caches locais...")
+        calculo_b = Contador(contar_areas)
+        resultados.append(verificar("Processo A", ler(processo_a, 'total_areas', contar_areas), 0))
+        resultados.append(verificar("Processo B", ler(processo_b, 'total_areas', calculo_b), 0))
+        ler(processo_b, 'total_areas', calculo_b)
+        resultados.append(verificar("Leituras em B sem gravação (cálculos)", calculo_b.chamadas, 1))
+
+        with processo_a.app_context():
+            area = AreaAtuacao(nome='Tecnologia')
+            db.session.add(area)
+            db.session.flush()
+            cargo = Cargo(nome='Desenvolvedor', area_id=area.id)
+            db.session.add(cargo)
+            db.session.flush()
+            funcionario = Funcionario(nome='Ana', cargo_id=cargo.id, area_id=area.id)
+            db.session.add(funcionario)
+            db.session.commit()
+            funcionario_id = funcionario.id
+
+        resultados.append(verificar("Processo B após gravação em A", ler(processo_b, 'total_areas', calculo_b), 1))
+
+        print("\n🔍 Horas do mês após um registro gravado em outro processo...")
+        chave = chave_horas_mes(2026, 3)
+        resultados.append(verificar("Processo B antes", ler(processo_b, chave, horas_mes), 0.0))
+        with processo_a.app_context():
+            db.session.add(RegistroHora(funcionario_id=funcionario_id, data=date(2026, 3, 2), horas=8))
+            db.session.commit()
+        resultados.append(verificar("Processo B após registro em A", ler(processo_b, chave, horas_mes), 8.0))
+
+        print("\n🔍 Horas do mês recalculadas pelo worker da fila (worker_resumos.py)...")
+        from flask_app.worker import drenar_fila
+        processo_a.config['RESUMOS_MODO'] = 'fila'
+        with processo_a.app_context():
+            db.session.add(RegistroHora(funcionario_id=funcionario_id, data=date(2026, 3, 3), horas=4))
+            db.session.commit()
+        resultados.append(verificar("Processo A com o dia na fila", ler(processo_a, chave, horas_mes), 8.0))
+        with processo_b.app_context():
+            drenar_fila()
+        resultados.append(verificar("Processo A após o worker em B", ler(processo_a, chave, horas_mes), 12.0))
+
+        print("\n🔍 Gerações lidas uma vez por intervalo, não por requisição...")
+        processo_c = criar_app_teste(caminho_banco, intervalo_geracoes=60)
+        consultas = contar_consultas_geracoes(
+            processo_c, lambda: [ler(processo_c, 'total_areas', contar_areas) for _ in range(5)]
+        )
+        resultados.append(verificar("Consultas às gerações em 5 leituras", consultas, 1))
+
+        print("\n🔍 Commit sem a tabela geracoes_cache (banco não migrado)...")
+        with processo_a.app_context():
+            GeracaoCache.__table__.drop(db.engine)
+            db.session.add(AreaAtuacao(nome='Financeiro'))
+            db.session.commit()
+        resultados.append(verificar("Processo A após o commit", ler(processo_a, 'total_areas', contar_areas), 2))
+
+        # Como o gunicorn.conf.py faz ao subir sem a tabela: sem gerações, TTL curto
+        processo_a.config['CACHE_GERACOES'] = False
+        calculo_a = Contador(contar_areas)
+        consultas = contar_consultas_geracoes(
+            processo_a, lambda: [ler(processo_a, 'total_areas', calculo_a) for _ in range(3)]
+        )
+        resultados.append(verificar("Consultas às gerações com CACHE_GERACOES desligado", consultas, 0))
+        resultados.append(verificar("Cálculos em 3 leituras com CACHE_GERACOES desligado", calculo_a.chamadas, 1))
+
+        for app in (processo_a, processo_b, processo_c):
+            with app.app_context():
+                db.engine.dispose()
+
+    if all(resultados):
+        print("\n🎉 Invalidação do cache vale entre processos!")
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
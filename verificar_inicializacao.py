@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Script de Verificação da Inicialização
+Mede o tempo de `import wsgi` em processos novos (como no cold start do Render)
+e garante que a importação não abre conexão com o banco. Com `python -X importtime`,
+confere que dependências pesadas (openpyxl) ficam fora do boot dos workers e que
+o custo total de importação não regride.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Orçamento do tempo de importação (mediana), em segundos
+ORCAMENTO_IMPORTACAO_SEGUNDOS = float(os.environ.get('ORCAMENTO_IMPORTACAO_SEGUNDOS', 1.5))
+EXECUCOES = 5
+
+# Módulos carregados só no primeiro uso (exportação Excel, cache Redis)
+MODULOS_SOB_DEMANDA = ('openpyxl', 'redis', 'flask_app.utils')
+
+# Limites do `-X importtime` ao importar wsgi: soma dos tempos próprios e
+# quantidade de módulos (cerca de 500 hoje; o openpyxl sozinho traz ~190).
+# O tempo varia com a máquina; a contagem de módulos é o limite mais estável.
+ORCAMENTO_IMPORTTIME_MS = float(os.environ.get('ORCAMENTO_IMPORTTIME_MS', 1500))
+MAX_MODULOS_IMPORTADOS = int(os.environ.get('MAX_MODULOS_IMPORTADOS', 550))
+
+MEDIR_IMPORTACAO = (
+    "import time; inicio = time.perf_counter(); import wsgi; "
+    "print(f'TEMPO={time.perf_counter() - inicio:.4f}')"
+)
+
+
+def _importar_wsgi(caminho_banco, *opcoes):
+    """Executa a importação de wsgi em um processo novo"""
+    ambiente = dict(os.environ, DATABASE_URL=f'sqlite:///{caminho_banco}', FLASK_ENV='development')
+    resultado = subprocess.run(
+        [sys.executable, *opcoes, '-c', MEDIR_IMPORTACAO],
+        capture_output=True, text=True, env=ambiente,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr)
+    return resultado
+
+
+def medir_importacao(caminho_banco):
+    """Importa wsgi em um processo novo e retorna o tempo em segundos"""
+    resultado = _importar_wsgi(caminho_banco)
+    linha = [l for l in resultado.stdout.splitlines() if l.startswith('TEMPO=')][-1]
+    return float(linha.split('=')[1])
+
+
+def custo_importacao(caminho_banco):
+    """
+    Tempo próprio (microssegundos) de cada módulo importado por wsgi, lido do
+    relatório de `python -X importtime`
+
+    Returns:
+        dict: {modulo: microssegundos}
+    """
+    resultado = _importar_wsgi(caminho_banco, '-X', 'importtime')
+    custos = {}
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:'):
+            continue
+        proprio, _, modulo = linha[len('import time:'):].split('|')
+        if proprio.strip().isdigit():
+            custos[modulo.strip()] = int(proprio)
+    return custos
+
+
+def verificar_importtime(caminho_banco):
+    print("\n🔍 Verificando o custo de importação (-X importtime)...")
+    custos = custo_importacao(caminho_banco)
+    total_ms = sum(custos.values()) / 1000
+    ok = True
+
+    carregados = sorted({
+        modulo for modulo in custos
+        for pesado in MODULOS_SOB_DEMANDA
+        if modulo == pesado or modulo.startswith(pesado + '.')
+    })
+    if carregados:
+        print(f"  ❌ Módulos que deveriam carregar sob demanda: {', '.join(carregados[:5])}")
+        ok = False
+    else:
+        print(f"  ✅ Nenhum de {', '.join(MODULOS_SOB_DEMANDA)} no boot")
+
+    status = '✅' if len(custos) <= MAX_MODULOS_IMPORTADOS else '❌'
+    print(f"  {status} {len(custos)} módulos importados (limite {MAX_MODULOS_IMPORTADOS})")
+    ok = ok and len(custos) <= MAX_MODULOS_IMPORTADOS
+
+    status = '✅' if total_ms <= ORCAMENTO_IMPORTTIME_MS else '❌'
+    print(f"  {status} {total_ms:.0f}ms somando os tempos próprios (orçamento {ORCAMENTO_IMPORTTIME_MS:.0f}ms)")
+    ok = ok and total_ms <= ORCAMENTO_IMPORTTIME_MS
+
+    if not ok:
+        print("  📋 Módulos mais caros:")
+        for modulo, custo in sorted(custos.items(), key=lambda item: -item[1])[:10]:
+            print(f"     {custo / 1000:7.1f}ms  {modulo}")
+    return ok
+
+
+def verificar_tempo(caminho_banco):
+    print(f"🔍 Medindo a importação de wsgi.py ({EXECUCOES} execuções)...")
+    tempos = [medir_importacao(caminho_banco) for _ in range(EXECUCOES)]
+    mediana = statistics.median(tempos)
+    print(f"  ⏱️  Mediana: {mediana:.3f}s (mín {min(tempos):.3f}s, máx {max(tempos):.3f}s)")
+
+    ok = True
+    # O SQLite cria o arquivo na primeira conexão: se ele existir, houve I/O no banco
+    if os.path.exists(caminho_banco):
+        print("  ❌ A importação abriu conexão com o banco")
+        ok = False
+    else:
+        print("  ✅ Nenhuma conexão com o banco na importação")
+
+    if mediana > ORCAMENTO_IMPORTACAO_SEGUNDOS:
+        print(f"  ❌ Acima do orçamento de {ORCAMENTO_IMPORTACAO_SEGUNDOS:.2f}s")
+        ok = False
+    else:
+        print(f"  ✅ Dentro do orçamento de {ORCAMENTO_IMPORTACAO_SEGUNDOS:.2f}s")
+    return ok
+
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_banco = os.path.join(pasta, 'inicializacao.db')
+        resultados = [verificar_tempo(caminho_banco), verificar_importtime(caminho_banco)]
+
+    if all(resultados):
+        print("\n🎉 Inicialização enxuta!")
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Script de Verificação dos Relatórios Excel
+Gera os relatórios diário, mensal e anual sobre um banco SQLite temporário e
+garante que a quantidade de queries não cresce com o número de registros.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+# Limite de queries por relatório, independente do volume de dados
+MAX_QUERIES_POR_RELATORIO = 5
+
+
+def criar_app_teste(caminho_banco):
+    os.environ['DATABASE_URL'] = f'sqlite:///{caminho_banco}'
+    os.environ.setdefault('FLASK_ENV', 'development')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import create_app
+    return create_app()
+
+
+def popular_dados(db, funcionarios, dias):
+    from flask_app.models import AreaAtuacao, Cargo, Funcionario, RegistroHora
+
+    areas = [AreaAtuacao(nome=f'Área {i}') for i in range(3)]
+    db.session.add_all(areas)
+    db.session.flush()
+
+    cargos = [Cargo(nome=f'Cargo {i}', area_id=areas[i % 3].id) for i in range(6)]
+    db.session.add_all(cargos)
+    db.session.flush()
+
+    lista = [
+        Funcionario(nome=f'Funcionário {i:04d}', cargo_id=cargos[i % 6].id, area_id=cargos[i % 6].area_id)
+        for i in range(funcionarios)
+    ]
+    db.session.add_all(lista)
+    db.session.flush()
+
+    inicio = date(2026, 1, 1)
+    db.session.add_all([
+        RegistroHora(funcionario_id=f.id, data=inicio + timedelta(days=d), horas=8)
+        for f in lista for d in range(dias)
+    ])
+    db.session.commit()
+
+
+def contar_queries(db, funcao):
+    """Executa `funcao` contando as instruções enviadas ao banco"""
+    from sqlalchemy import event
+
+    contador = {'total': 0}
+
+    def ao_executar(conn, cursor, statement, parameters, context, executemany):
+        contador['total'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', ao_executar)
+    try:
+        funcao()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', ao_executar)
+    return contador['total']
+
+
+def verificar_volume(funcionarios, dias):
+    print(f"\n📊 Verificando com {funcionarios} funcionários x {dias} dias...")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = criar_app_teste(os.path.join(pasta, 'verificacao.db'))
+        from flask_app.models import db, criar_estrutura
+        from flask_app.utils import gerar_relatorio_excel
+
+        with app.app_context():
+            criar_estrutura()
+            popular_dados(db, funcionarios, dias)
+
+            resultados = {}
+            for tipo in ('diario', 'mensal', 'anual'):
+                queries = contar_queries(
+                    db, lambda: gerar_relatorio_excel(tipo=tipo, mes=1, ano=2026)
+                )
+                resultados[tipo] = queries
+                status = '✅' if queries <= MAX_QUERIES_POR_RELATORIO else '❌'
+                print(f"  {status} Relatório {tipo}: {queries} queries")
+
+            db.session.remove()
+            db.engine.dispose()
+
+    return resultados
+
+
+def main():
+    print("🔍 Verificando quantidade de queries dos relatórios Excel...")
+
+    pequeno = verificar_volume(funcionarios=5, dias=5)
+    grande = verificar_volume(funcionarios=60, dias=31)
+
+    ok = True
+    for tipo in pequeno:
+        if grande[tipo] > MAX_QUERIES_POR_RELATORIO:
+            print(f"❌ Relatório {tipo} excedeu {MAX_QUERIES_POR_RELATORIO} queries")
+            ok = False
+        if grande[tipo] != pequeno[tipo]:
+            print(f"❌ Relatório {tipo} cresce com o volume ({pequeno[tipo]} → {grande[tipo]} queries)")
+            ok = False
+
+    if ok:
+        print("\n🎉 Relatórios com quantidade de queries constante!")
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
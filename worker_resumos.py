@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Worker de Resumos Diários
+Recalcula os resumos dos dias marcados em DiaPendente (RESUMOS_MODO=fila).
+Cada lote confirmado invalida as horas do mês no cache dos workers web: no Redis
+as chaves são apagadas; com o cache local, a geração delas em geracoes_cache muda.
+
+Uso:
+    python worker_resumos.py            # loop contínuo
+    python worker_resumos.py --uma-vez  # drena a fila e sai
+"""
+
+import argparse
+import logging
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker de resumos diários')
+    parser.add_argument('--uma-vez', action='store_true', help='Drena a fila uma vez e sai')
+    parser.add_argument('--intervalo', type=float, default=2, help='Segundos entre verificações da fila')
+    parser.add_argument('--lote', type=int, default=None, help='Dias recalculados por lote')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+
+    from wsgi import app
+    from flask_app.models import TAMANHO_LOTE_RESUMOS
+    from flask_app.worker import drenar_fila, executar_worker
+
+    tamanho_lote = args.lote or TAMANHO_LOTE_RESUMOS
+
+    if args.uma_vez:
+        with app.app_context():
+            processados = drenar_fila(tamanho_lote)
+        print(f"✅ {processados} dias recalculados")
+        return 0
+
+    try:
+        executar_worker(app, intervalo=args.intervalo, tamanho_lote=tamanho_lote)
+    except KeyboardInterrupt:
+        print("⏹️  Worker encerrado")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())